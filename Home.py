@@ -1,13 +1,19 @@
 import tempfile
 import streamlit as st
-from langchain.memory import ConversationBufferMemory
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from loaders import carrega_site, carrega_youtube, carrega_pdf, carrega_docx, carrega_txt, carrega_csv, carrega_imagem
+from loaders import carrega_site, carrega_youtube, extrai_documento
+from documentos import RegistroDocumentos, estima_tokens, monta_contexto
+from cache_respostas import CACHE_RESPOSTAS, reproduz_resposta
+from roteamento import CATALOGO, ErroRoteamento, Roteador, estima_tokens_prompt
+from limitador import limitador, metricas as metricas_limitador
+from clientes import estatisticas as estatisticas_clientes
+from assistente import cria_chat, monta_template, system_message
+from metricas import COLETOR, define_sessao, incrementa, medir, mede_stream, registra
+from normalizacao import normalizador_com_metricas
 
 import os
 import re
+import time
+import uuid
 
 
 
@@ -31,7 +37,6 @@ CONFIG_MODELOS = {
             'gpt-5-nano',
             'gpt-5',
         ],
-        'chat': ChatOpenAI,
         'api_key': openai
     },
     'Groq': {
@@ -40,12 +45,22 @@ CONFIG_MODELOS = {
             'llama-3.3-70b-versatile',  
             'qwen-qwq-32b'
         ],
-        'chat': ChatGroq,
         'api_key': groq
     }
 }
 
-MEMORIA = ConversationBufferMemory()
+def nova_memoria():
+    from langchain.memory import ConversationBufferMemory  # lazy import
+    return ConversationBufferMemory()
+
+@st.cache_resource
+def roteador():
+    """Roteador compartilhado pelo processo (mantém o TTFT medido de cada modelo)."""
+    fabricas = {
+        provedor: (lambda modelo, provedor=provedor, cfg=cfg: cria_chat(provedor, modelo, cfg['api_key']))
+        for provedor, cfg in CONFIG_MODELOS.items() if cfg['api_key']
+    }
+    return Roteador(CATALOGO, fabricas, hedge_apos=8.0)
 
 def identificar_tipo_entrada(input_usuario, arquivo):
     """Identifica o tipo de documento e extrai URLs da mensagem."""
@@ -84,123 +99,80 @@ def identificar_tipo_entrada(input_usuario, arquivo):
     return None, None, None
 
 def carrega_arquivos(tipo_arquivo, arquivo):
+    """URLs da mensagem (os arquivos enviados passam por extrai_arquivo)."""
     if tipo_arquivo == 'Chat':
         return "Modo Chat ativado. Nenhum documento carregado."
     if tipo_arquivo == 'Analisador de Site':
         return carrega_site(arquivo)
     if tipo_arquivo == 'Analisador de Youtube':
         return carrega_youtube(arquivo)
-    if tipo_arquivo == 'Analisador de Pdf':
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp:
-            temp.write(arquivo.read())
-            nome_temp = temp.name
-        return carrega_pdf(nome_temp)
-    if tipo_arquivo == 'Analisador de DOCX':
-        with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as temp:
-            temp.write(arquivo.read())
-            nome_temp = temp.name
-        return carrega_docx(nome_temp)
-    if tipo_arquivo == 'Analisador de CSV':
-        with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as temp:
-            temp.write(arquivo.read())
-            nome_temp = temp.name
-        return carrega_csv(nome_temp)
-    if tipo_arquivo == 'Analisador de Texto':
-        with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as temp:
-            temp.write(arquivo.read())
-            nome_temp = temp.name
-        return carrega_txt(nome_temp)
-    if tipo_arquivo == 'Analisador de Imagem':
-        with tempfile.NamedTemporaryFile(delete=False) as temp:
-            temp.write(arquivo.read())
-            nome_temp = temp.name
-        return carrega_imagem(nome_temp)
+
+def extrai_arquivo(tipo_arquivo, arquivo):
+    """Texto de um arquivo enviado; levanta ErroCarregamento em vez de parar a página."""
+    sufixo = os.path.splitext(arquivo.name)[1].lower()
+    with tempfile.NamedTemporaryFile(suffix=sufixo, delete=False) as temp:
+        temp.write(arquivo.getvalue())
+        nome_temp = temp.name
+    try:
+        return extrai_documento(nome_temp, tipo_arquivo)
+    finally:
+        os.unlink(nome_temp)
+
+def carrega_com_metricas(tipo_arquivo, entrada, carregador=carrega_arquivos):
+    """Carrega com um span por loader (duração e tamanho em tokens)."""
+    with medir('loader', tipo=tipo_arquivo) as span:
+        texto = carregador(tipo_arquivo, entrada)
+        span['tokens_documento'] = estima_tokens(texto or '')
+        return texto
+
+def registro_da_sessao():
+    """Registro de documentos já processados nesta sessão."""
+    if 'documentos' not in st.session_state:
+        st.session_state['documentos'] = RegistroDocumentos()
+    return st.session_state['documentos']
+
+def registra_arquivo(registro, arquivo):
+    """
+    Processa o arquivo enviado uma única vez (pelo hash do conteúdo).
+    Levanta ErroCarregamento se o arquivo não puder ser lido.
+    """
+    tipo_arquivo, entrada, _ = identificar_tipo_entrada(None, arquivo)
+    if tipo_arquivo is None:
+        return None
+    return registro.adiciona(
+        tipo_arquivo, arquivo.name, arquivo.getvalue(),
+        lambda: carrega_com_metricas(tipo_arquivo, entrada, extrai_arquivo),
+        normalizador_com_metricas(tipo_arquivo)
+    )
+
+def registra_url(registro, tipo_arquivo, url):
+    """Processa a URL uma única vez (pelo hash da própria URL)."""
+    return registro.adiciona(
+        tipo_arquivo, url, url,
+        lambda: carrega_com_metricas(tipo_arquivo, url),
+        normalizador_com_metricas(tipo_arquivo)
+    )
+
+def documentos_ativos(registro):
+    """Documentos marcados na barra lateral para responder às perguntas."""
+    return [d for d in registro.lista() if st.session_state.get(f"doc_ativo_{d.id}", True)]
 
 def carrega_modelo(provedor, modelo, api_key):
     try:
         # System prompt inicial sem tipo_arquivo
-        system_message = f'''# Instruções para o autoMazze Assistant
-
-## IDENTIDADE E PROPÓSITO
-Você é o autoMazze, um assistente de IA avançado e extremamente inteligente projetado para análise profunda de documentos e conteúdo.
-Você foi programado para ser preciso, detalhista e fornecer insights valiosos sobre o conteúdo analisado.
-
-## REGRAS DE COMPORTAMENTO
-
-### Processamento e Análise
-1. **Priorize informações relevantes** do documento fornecido
-2. **Identifique padrões e conexões** entre diferentes partes do documento
-3. **Extraia insights principais** que talvez não estejam explícitos
-4. **Interprete dados complexos** de forma acessível e compreensível
-5. **Forneça contexto adicional** quando necessário para melhorar a compreensão
-
-### Quando Responder
-1. **Seja detalhado** nas respostas, não apenas superficial
-2. **Estruture informações** de maneira lógica e facilmente compreensível
-3. **Adapte o nível de complexidade** de acordo com o contexto da pergunta
-4. **Quando apropriado, sugira ações** baseadas nos insights do documento
-5. **Corrija equívocos** respeitosamente quando o usuário interpretar incorretamente o conteúdo
-
-### Formato e Estilo de Respostas
-1. Use **negrito** para destacar conceitos-chave importantes
-2. Utilize *itálico* para enfatizar pontos secundários relevantes
-3. Aplique `código` para elementos técnicos específicos quando necessário
-4. Organize informações em **seções hierárquicas** com cabeçalhos (##, ###)
-5. Use listas numeradas para processos sequenciais e marcadores para itens não ordenados
-6. Inclua emojis 🔍 estrategicamente para melhorar a legibilidade (com moderação)
-7. Crie tabelas quando houver dados comparativos ou estruturados
-8. Para códigos ou conteúdo técnico, utilize blocos de código com a sintaxe apropriada
-
-## CAPACIDADES ESPECIAIS
-
-### Análise de Dados
-- Identifique tendências, padrões e anomalias em dados numéricos
-- Reconheça correlações entre diferentes conjuntos de dados
-- Ofereça visualizações descritivas de dados complexos
-
-### Análise de Texto
-- Identifique temas centrais e subtemas
-- Reconheça tom, sentimento e intenção do autor
-- Detecte contradições ou inconsistências no texto
-- Resuma conteúdo extenso mantendo os pontos-chave
-
-### Resolução de Problemas
-- Defina claramente o problema apresentado
-- Explore múltiplas abordagens para solução
-- Avalie prós e contras de cada abordagem
-- Recomende a solução mais adequada com justificativa
-
-## ORIENTAÇÕES FINAIS
-- Substitua qualquer "$" por "S" nas suas respostas
-- Se o documento contiver apenas "Just a moment..." ou mensagens de erro similares, informe o usuário para tentar novamente
-- Sempre que possível, apresente uma conclusão sintetizando os principais pontos abordados
-- Quando não tiver informação suficiente, seja transparente e solicite esclarecimentos
-
-Agora, responda às perguntas do usuário com inteligência, profundidade e clareza excepcional.
-'''
-
-        print(system_message)
-
-        template = ChatPromptTemplate.from_messages([
-            ('system', system_message),
-            ('placeholder', '{chat_history}'),
-            ('user', '{input}')
-        ])
+        mensagem_sistema = system_message()
+
+        print(mensagem_sistema)
+
+        template = monta_template(mensagem_sistema)
         
-        if provedor == 'OpenAI':
-            chat = CONFIG_MODELOS[provedor]['chat'](
-                model=modelo, 
-                api_key=api_key,
-                temperature=1
-            )
-        else:
-            chat = CONFIG_MODELOS[provedor]['chat'](
-                model=modelo, 
-                api_key=api_key
-            )
+        chat = cria_chat(provedor, modelo, api_key)
             
         chain = template | chat
         st.session_state['chain'] = chain
+        st.session_state['modelo_chat'] = chat
+        st.session_state['modelo_nome'] = f"{provedor}/{modelo}"
+        st.session_state['provedor'] = provedor
         st.session_state['modelo_carregado'] = True
         st.success(f"{modelo} carregado")
 
@@ -210,20 +182,35 @@ Agora, responda às perguntas do usuário com inteligência, profundidade e clar
 def pagina_chat():
     col1, col2, col3 = st.columns([5, 1, 5])
     
-    # Initialize the session state for file if it doesn't exist
-    if 'uploaded_file' not in st.session_state:
-        st.session_state['uploaded_file'] = None
+    registro = registro_da_sessao()
+    # A versão na key permite esvaziar o uploader depois que os arquivos foram processados
+    if 'uploader_versao' not in st.session_state:
+        st.session_state['uploader_versao'] = 0
 
         
     with col3:
-        # Store the file in session state instead of a local variable
-        uploaded_file = st.file_uploader("Envie um arquivo (PDF, CSV, TXT, Imagem, DOCX)", 
-                                         type=['pdf', 'csv', 'txt', 'png', 'jpg', 'jpeg', 'docx'], 
-                                         key="chat_file_uploader")
+        uploaded_files = st.file_uploader("Envie arquivos (PDF, CSV, TXT, Imagem, DOCX)", 
+                                          type=['pdf', 'csv', 'txt', 'png', 'jpg', 'jpeg', 'docx'], 
+                                          accept_multiple_files=True,
+                                          key=f"chat_file_uploader_{st.session_state['uploader_versao']}")
         
-        # Update session state when a new file is uploaded
-        if uploaded_file is not None:
-            st.session_state['uploaded_file'] = uploaded_file
+        # Cada arquivo é processado uma vez e passa a viver no registro da sessão
+        if uploaded_files:
+            with st.spinner('Processando documentos...'):
+                # Um arquivo com erro não impede os demais nem trava o uploader
+                falhas = []
+                for uploaded_file in uploaded_files:
+                    try:
+                        registra_arquivo(registro, uploaded_file)
+                    except Exception as e:
+                        falhas.append(f"**{uploaded_file.name}**: {e}")
+            st.session_state['uploader_versao'] += 1
+            if falhas:
+                st.session_state['falhas_upload'] = falhas
+            st.rerun()
+        # Mostrado após o rerun, já com o uploader vazio
+        for falha in st.session_state.pop('falhas_upload', []):
+            st.error(falha)
     
     with col1:
         
@@ -238,7 +225,9 @@ def pagina_chat():
         st.info('👈 Por favor, selecione um provedor e modelo na barra lateral para começar.')
         st.stop()
 
-    memoria = st.session_state.get('memoria', MEMORIA)
+    if 'memoria' not in st.session_state:
+        st.session_state['memoria'] = nova_memoria()
+    memoria = st.session_state['memoria']
     for mensagem in memoria.buffer_as_messages:
         chat = st.chat_message(mensagem.type)
         chat.markdown(mensagem.content)
@@ -248,109 +237,81 @@ def pagina_chat():
 
     # Only process when there's user input
     if input_usuario:
-        # Get the file from session state
-        arquivo = st.session_state['uploaded_file']
-        
-        # Identificar o tipo de entrada e extrair o prompt
-        tipo_arquivo, entrada, prompt = identificar_tipo_entrada(input_usuario, arquivo)
+        # Identificar se a mensagem traz uma URL (os arquivos já estão no registro)
+        with medir('identificar_tipo_entrada'):
+            tipo_entrada, entrada, prompt = identificar_tipo_entrada(input_usuario, None)
 
-        if tipo_arquivo is None:
+        if tipo_entrada is None:
             st.stop()
 
         # Exibir a mensagem do usuário no chat
         chat = st.chat_message('human')
         chat.markdown(input_usuario)
-        if arquivo:
-            chat.markdown(f"Utilizando arquivo: **{arquivo.name}**")
 
         with st.spinner('autoMazze está processando...'):
-            # Carregar o documento com base no tipo identificado
-            documento = carrega_arquivos(tipo_arquivo, entrada) if tipo_arquivo != 'Chat' else ""
+            # URLs também entram no registro e não são recarregadas nas próximas perguntas
+            if tipo_entrada in ('Analisador de Site', 'Analisador de Youtube'):
+                registra_url(registro, tipo_entrada, entrada)
+
+            selecionados = documentos_ativos(registro)
+            if selecionados:
+                chat.markdown("Utilizando: " + ", ".join(f"**{d.nome}**" for d in selecionados))
+                tipo_arquivo = ", ".join(dict.fromkeys(d.tipo for d in selecionados))
+            else:
+                tipo_arquivo = 'Chat'
+            documento = monta_contexto(selecionados)
+            inicio_prompt = time.perf_counter()
 
             # Atualizar o system prompt com o tipo de documento e conteúdo
-            system_message = f'''# Instruções para o autoMazze Assistant
-
-## IDENTIDADE E PROPÓSITO
-Você é o autoMazze, um assistente de IA avançado e extremamente inteligente projetado para análise profunda de documentos e conteúdo.
-Você foi programado para ser preciso, detalhista e fornecer insights valiosos sobre o conteúdo analisado.
-
-## FONTE DE DADOS ATUAL
-Você está analisando um documento do tipo: **{tipo_arquivo}**
-
-O conteúdo do documento é:
-
-{documento}
-
-## REGRAS DE COMPORTAMENTO
-
-### Processamento e Análise
-1. **Priorize informações relevantes** do documento fornecido
-2. **Identifique padrões e conexões** entre diferentes partes do documento
-3. **Extraia insights principais** que talvez não estejam explícitos
-4. **Interprete dados complexos** de forma acessível e compreensível
-5. **Forneça contexto adicional** quando necessário para melhorar a compreensão
-6. **Se o tipo do documento foi exatamente = Analisador de Imagem, então você estará analisando uma imagem.
-
-### Quando Responder
-1. **Seja detalhado** nas respostas, não apenas superficial
-2. **Estruture informações** de maneira lógica e facilmente compreensível
-3. **Adapte o nível de complexidade** de acordo com o contexto da pergunta
-4. **Quando apropriado, sugira ações** baseadas nos insights do documento
-5. **Corrija equívocos** respeitosamente quando o usuário interpretar incorretamente o conteúdo
-
-### Formato e Estilo de Respostas
-1. Use **negrito** para destacar conceitos-chave importantes
-2. Utilize *itálico* para enfatizar pontos secundários relevantes
-3. Aplique `código` para elementos técnicos específicos quando necessário
-4. Organize informações em **seções hierárquicas** com cabeçalhos (##, ###)
-5. Use listas numeradas para processos sequenciais e marcadores para itens não ordenados
-6. Inclua emojis 🔍 estrategicamente para melhorar a legibilidade (com moderação)
-7. Crie tabelas quando houver dados comparativos ou estruturados
-8. Para códigos ou conteúdo técnico, utilize blocos de código com a sintaxe apropriada
-
-## CAPACIDADES ESPECIAIS
-
-### Análise de Dados
-- Identifique tendências, padrões e anomalias em dados numéricos
-- Reconheça correlações entre diferentes conjuntos de dados
-- Ofereça visualizações descritivas de dados complexos
-
-### Análise de Texto
-- Identifique temas centrais e subtemas
-- Reconheça tom, sentimento e intenção do autor
-- Detecte contradições ou inconsistências no texto
-- Resuma conteúdo extenso mantendo os pontos-chave
-
-### Resolução de Problemas
-- Defina claramente o problema apresentado
-- Explore múltiplas abordagens para solução
-- Avalie prós e contras de cada abordagem
-- Recomende a solução mais adequada com justificativa
-
-## ORIENTAÇÕES FINAIS
-- Substitua qualquer "$" por "S" nas suas respostas
-- Se o documento contiver apenas "Just a moment..." ou mensagens de erro similares, informe o usuário para tentar novamente
-- Sempre que possível, apresente uma conclusão sintetizando os principais pontos abordados
-- Quando não tiver informação suficiente, seja transparente e solicite esclarecimentos
-
-Agora, responda às perguntas do usuário com inteligência, profundidade e clareza excepcional.
-'''
-
-            template = ChatPromptTemplate.from_messages([
-                ('system', system_message),
-                ('placeholder', '{chat_history}'),
-                ('user', '{input}')
-            ])
+            mensagem_sistema = system_message(tipo_arquivo, documento)
+            template = monta_template(mensagem_sistema)
             
-            chain = template | chain
-            st.session_state['chain'] = chain
+            chain = template | st.session_state['modelo_chat']
+            historico = memoria.buffer_as_messages
+            tokens_prompt = estima_tokens_prompt([mensagem_sistema, prompt] + [m.content for m in historico])
+            registra('montagem_prompt', time.perf_counter() - inicio_prompt,
+                     documentos=len(selecionados), tokens_prompt=tokens_prompt)
+
+            # Perguntas repetidas sobre os mesmos documentos saem do cache de respostas
+            doc_hashes = [d.hash for d in selecionados]
+            roteamento_automatico = st.session_state.get('roteamento_automatico', False)
+            modelo_nome = 'roteamento' if roteamento_automatico else st.session_state.get('modelo_nome', '')
+            usar_cache = st.session_state.get('usar_cache', True)
+            em_cache = CACHE_RESPOSTAS.busca(doc_hashes, modelo_nome, prompt, historico) if usar_cache else None
+            if usar_cache:
+                incrementa('cache_respostas', resultado='acerto' if em_cache is not None else 'falha')
+            if em_cache is None:
+                incrementa('tokens', tokens_prompt, tipo='prompt')
 
             # Usar o prompt completo enviado pelo usuário
             chat = st.chat_message('ai')
-            resposta = chat.write_stream(chain.stream({
-                'input': prompt, 
-                'chat_history': memoria.buffer_as_messages
-            }))
+            if em_cache is not None:
+                resposta = chat.write_stream(reproduz_resposta(em_cache))
+            elif roteamento_automatico:
+                # O modelo é escolhido pelo tamanho do prompt, com troca de provedor em 429/timeout
+                escolha = {}
+                try:
+                    resposta = chat.write_stream(mede_stream(roteador().stream(template, {
+                        'input': prompt, 
+                        'chat_history': historico
+                    }, tokens_prompt, escolha), modelo=modelo_nome))
+                except ErroRoteamento as e:
+                    st.error(str(e))
+                    st.stop()
+                if escolha:
+                    perfil = escolha['perfil']
+                    chat.caption(f"🔀 {perfil.provedor}/{perfil.modelo} · ~{tokens_prompt} tokens · primeiro token em {escolha['ttft']:.1f}s")
+                if usar_cache:
+                    CACHE_RESPOSTAS.guarda(doc_hashes, modelo_nome, prompt, historico, resposta)
+            else:
+                # Fila/cota compartilhada por provedor, com retentativa antes do primeiro token
+                provedor = st.session_state.get('provedor', 'OpenAI')
+                resposta = chat.write_stream(mede_stream(limitador(provedor, 'chat').stream(lambda: chain.stream({
+                    'input': prompt, 
+                    'chat_history': historico
+                })), modelo=modelo_nome))
+                if usar_cache:
+                    CACHE_RESPOSTAS.guarda(doc_hashes, modelo_nome, prompt, historico, resposta)
             
             memoria.chat_memory.add_user_message(prompt)
             memoria.chat_memory.add_ai_message(resposta)
@@ -368,6 +329,10 @@ def sidebar():
         
         if not api_key:
             st.warning(f"Chave de API do {provedor} não encontrada no arquivo .env. Por favor, configure-a antes de continuar.")
+
+        st.checkbox('Reutilizar respostas de perguntas repetidas', value=True, key='usar_cache')
+        st.checkbox('Escolher o modelo pelo tamanho do documento', value=False, key='roteamento_automatico',
+                    help='Usa o modelo mais barato cuja janela de contexto comporta o prompt e troca de provedor em caso de limite (429) ou timeout.')
         
     col1, col2 = st.sidebar.columns(2)
     with col1:
@@ -380,26 +345,64 @@ def sidebar():
     
     with col2:
         if st.button('🔄 Limpar Chat', use_container_width=True):
-            st.session_state['memoria'] = MEMORIA
+            st.session_state['memoria'] = nova_memoria()
             st.session_state['modelo_carregado'] = False
-            st.session_state['uploaded_file'] = None  # Também limpar o arquivo ao limpar o chat
+            registro_da_sessao().limpa()  # Também limpar os documentos ao limpar o chat
             st.success("Conversa apagada!")
     
-    # Status do arquivo carregado
-    if 'uploaded_file' in st.session_state and st.session_state['uploaded_file'] is not None:
-        st.sidebar.success(f"📄 Arquivo carregado: {st.session_state['uploaded_file'].name}")
-        if st.sidebar.button("Remover arquivo", use_container_width=True):
-            st.session_state['uploaded_file'] = None
-            st.success("Arquivo removido!")
-            st.rerun()
+    # Documentos carregados na sessão
+    registro = registro_da_sessao()
+    if len(registro):
+        st.sidebar.divider()
+        st.sidebar.markdown("### 📚 Documentos")
+        for doc in registro.lista():
+            economia = f", −{doc.tokens_economizados} na limpeza" if doc.tokens_economizados else ""
+            st.sidebar.checkbox(f"📄 {doc.nome} (~{doc.tokens} tokens{economia})", value=True, key=f"doc_ativo_{doc.id}")
+            if st.sidebar.button("Remover", key=f"remove_{doc.id}", use_container_width=True):
+                registro.remove(doc.id)
+                st.session_state.pop(f"doc_ativo_{doc.id}", None)
+                st.rerun()
+    
+    # Fila, cota e pool de conexões das APIs (compartilhados por todas as sessões)
+    filas = metricas_limitador()
+    pools = estatisticas_clientes()
+    # TTFT e falhas por modelo medidos pelo roteamento automático (só modelos já usados)
+    modelos = [m for m in roteador().resumo() if m['chamadas'] or m['falhas']]
+    if filas or pools or modelos:
+        with st.sidebar.expander("⏱️ Chamadas às APIs"):
+            if filas:
+                st.table(filas)
+            if pools:
+                st.table(pools)
+            if modelos:
+                st.table(modelos)
+    
+    # Métricas por etapa (opcional)
+    if st.sidebar.checkbox('📊 Mostrar métricas de desempenho', value=False, key='mostrar_metricas'):
+        with st.sidebar.expander("📊 Métricas desta sessão", expanded=True):
+            spans = COLETOR.spans(st.session_state.get('sessao_id'), limite=25)
+            if spans:
+                st.table([{k: v for k, v in s.items() if k not in ('inicio', 'sessao')} for s in reversed(spans)])
+            else:
+                st.caption("Nenhuma etapa medida ainda.")
+            st.download_button("⬇️ JSONL", COLETOR.exporta_jsonl(st.session_state.get('sessao_id')),
+                               file_name="metricas.jsonl", use_container_width=True)
+            st.download_button("⬇️ Prometheus", COLETOR.exporta_prometheus(),
+                               file_name="metricas.prom", use_container_width=True)
     
     st.sidebar.divider()
     st.sidebar.caption("© 2025 autoMazze Assistant")
 
 def main():
+    if 'sessao_id' not in st.session_state:
+        st.session_state['sessao_id'] = uuid.uuid4().hex[:8]
+    define_sessao(st.session_state['sessao_id'])
     with st.sidebar:
         sidebar()
-    pagina_chat()
+    try:
+        pagina_chat()
+    finally:
+        COLETOR.persiste()
 
 if __name__ == '__main__':
     main()
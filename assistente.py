@@ -0,0 +1,165 @@
+# assistente.py
+# Prompt e chat do autoMazze sem dependência da interface: usados pela Home.py
+# e pelo modo em lote (lote.py).
+
+import importlib
+import os
+from typing import Optional
+
+from clientes import cliente_chat
+
+
+# Classe de chat de cada provedor, importada só quando o provedor é usado
+CLASSES_CHAT = {
+    'OpenAI': 'langchain_openai:ChatOpenAI',
+    'Groq': 'langchain_groq:ChatGroq',
+}
+
+VARIAVEIS_CHAVE = {
+    'OpenAI': 'OPENAI_API_KEY',
+    'Groq': 'GROQ_API_KEY',
+}
+
+
+# ---------------------------------------------------------------------
+# Chat
+# ---------------------------------------------------------------------
+
+def classe_chat(provedor):
+    """Importa a classe de chat só quando o provedor é usado (LangChain pesa no cold start)."""
+    modulo, nome = CLASSES_CHAT[provedor].split(':')
+    return getattr(importlib.import_module(modulo), nome)
+
+
+def cria_chat(provedor, modelo, api_key):
+    """Instância compartilhada pelo processo (mesmo pool de conexões entre sessões)."""
+    if provedor == 'OpenAI':
+        return cliente_chat(
+            classe_chat(provedor), provedor,
+            modelo, api_key,
+            temperature=1
+        )
+    return cliente_chat(
+        classe_chat(provedor), provedor,
+        modelo, api_key
+    )
+
+
+def chave_api(provedor) -> Optional[str]:
+    """Chave do provedor fora do Streamlit: variável de ambiente, .env ou .streamlit/secrets.toml."""
+    variavel = VARIAVEIS_CHAVE[provedor]
+    try:
+        from dotenv import load_dotenv  # lazy import
+        load_dotenv()
+    except ImportError:
+        pass
+    if os.environ.get(variavel):
+        return os.environ[variavel]
+    try:
+        import tomllib  # lazy import (Python 3.11+)
+        with open(os.path.join('.streamlit', 'secrets.toml'), 'rb') as f:
+            return tomllib.load(f).get(variavel) or None
+    except (ImportError, OSError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------
+# Prompt
+# ---------------------------------------------------------------------
+
+_IDENTIDADE = '''# Instruções para o autoMazze Assistant
+
+## IDENTIDADE E PROPÓSITO
+Você é o autoMazze, um assistente de IA avançado e extremamente inteligente projetado para análise profunda de documentos e conteúdo.
+Você foi programado para ser preciso, detalhista e fornecer insights valiosos sobre o conteúdo analisado.
+
+'''
+
+_FONTE = '''## FONTE DE DADOS ATUAL
+Você está analisando um documento do tipo: **{tipo_arquivo}**
+
+O conteúdo do documento é:
+
+{documento}
+
+'''
+
+_PROCESSAMENTO = '''## REGRAS DE COMPORTAMENTO
+
+### Processamento e Análise
+1. **Priorize informações relevantes** do documento fornecido
+2. **Identifique padrões e conexões** entre diferentes partes do documento
+3. **Extraia insights principais** que talvez não estejam explícitos
+4. **Interprete dados complexos** de forma acessível e compreensível
+5. **Forneça contexto adicional** quando necessário para melhorar a compreensão
+'''
+
+_REGRA_IMAGEM = '''6. **Se o tipo do documento foi exatamente = Analisador de Imagem, então você estará analisando uma imagem.
+'''
+
+_REGRAS = '''
+### Quando Responder
+1. **Seja detalhado** nas respostas, não apenas superficial
+2. **Estruture informações** de maneira lógica e facilmente compreensível
+3. **Adapte o nível de complexidade** de acordo com o contexto da pergunta
+4. **Quando apropriado, sugira ações** baseadas nos insights do documento
+5. **Corrija equívocos** respeitosamente quando o usuário interpretar incorretamente o conteúdo
+
+### Formato e Estilo de Respostas
+1. Use **negrito** para destacar conceitos-chave importantes
+2. Utilize *itálico* para enfatizar pontos secundários relevantes
+3. Aplique `código` para elementos técnicos específicos quando necessário
+4. Organize informações em **seções hierárquicas** com cabeçalhos (##, ###)
+5. Use listas numeradas para processos sequenciais e marcadores para itens não ordenados
+6. Inclua emojis 🔍 estrategicamente para melhorar a legibilidade (com moderação)
+7. Crie tabelas quando houver dados comparativos ou estruturados
+8. Para códigos ou conteúdo técnico, utilize blocos de código com a sintaxe apropriada
+
+## CAPACIDADES ESPECIAIS
+
+### Análise de Dados
+- Identifique tendências, padrões e anomalias em dados numéricos
+- Reconheça correlações entre diferentes conjuntos de dados
+- Ofereça visualizações descritivas de dados complexos
+
+### Análise de Texto
+- Identifique temas centrais e subtemas
+- Reconheça tom, sentimento e intenção do autor
+- Detecte contradições ou inconsistências no texto
+- Resuma conteúdo extenso mantendo os pontos-chave
+
+### Resolução de Problemas
+- Defina claramente o problema apresentado
+- Explore múltiplas abordagens para solução
+- Avalie prós e contras de cada abordagem
+- Recomende a solução mais adequada com justificativa
+
+## ORIENTAÇÕES FINAIS
+- Substitua qualquer "$" por "S" nas suas respostas
+- Se o documento contiver apenas "Just a moment..." ou mensagens de erro similares, informe o usuário para tentar novamente
+- Sempre que possível, apresente uma conclusão sintetizando os principais pontos abordados
+- Quando não tiver informação suficiente, seja transparente e solicite esclarecimentos
+
+Agora, responda às perguntas do usuário com inteligência, profundidade e clareza excepcional.
+'''
+
+
+def system_message(tipo_arquivo=None, documento=None):
+    """
+    System prompt do autoMazze; sem tipo_arquivo, é o prompt inicial (sem documento).
+    Chaves do documento (CSV, código, JSON) são escapadas para o ChatPromptTemplate.
+    """
+    if tipo_arquivo is None:
+        return _IDENTIDADE + _PROCESSAMENTO + _REGRAS
+    documento = (documento or '').replace('{', '{{').replace('}', '}}')
+    fonte = _FONTE.format(tipo_arquivo=tipo_arquivo, documento=documento)
+    return _IDENTIDADE + fonte + _PROCESSAMENTO + _REGRA_IMAGEM + _REGRAS
+
+
+def monta_template(system_message):
+    from langchain.prompts import ChatPromptTemplate  # lazy import
+    return ChatPromptTemplate.from_messages([
+        ('system', system_message),
+        ('placeholder', '{chat_history}'),
+        ('user', '{input}')
+    ])
@@ -0,0 +1,576 @@
+# benchmark.py
+# Benchmark offline dos loaders e do pipeline de chat, sem rede nem chaves de API.
+#
+# Uso:
+#   python benchmark.py                        # roda tudo e compara com a baseline, se existir
+#   python benchmark.py --casos csv,txt,chat   # só alguns casos
+#   python benchmark.py --salvar-baseline      # grava os resultados como nova baseline
+#
+# Cada caso roda em um subprocesso próprio, para que o pico de RSS e os caches
+# (st.cache_data) de um caso não contaminem os outros.
+
+import argparse
+import json
+import math
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import wave
+import zipfile
+import zlib
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+RAIZ = Path(__file__).parent
+BASELINE_PADRAO = RAIZ / "benchmarks" / "baseline.json"
+
+
+# ---------------------------------------------------------------------
+# Corpus de fixtures (gerado em pasta temporária)
+# ---------------------------------------------------------------------
+
+_FRASES = [
+    "O relatório trimestral apresenta crescimento consistente nas vendas da região sul.",
+    "A equipe de operações revisou os contratos com fornecedores de logística.",
+    "Os indicadores de satisfação dos clientes melhoraram após a nova política de atendimento.",
+    "O orçamento de marketing foi realocado para canais digitais com melhor retorno.",
+    "Foram identificados atrasos recorrentes na entrega de componentes importados.",
+    "A diretoria aprovou o plano de expansão para duas novas unidades no próximo ano.",
+]
+
+
+def _paragrafos(n: int) -> List[str]:
+    return [" ".join(_FRASES[(i + j) % len(_FRASES)] for j in range(4)) for i in range(n)]
+
+
+def _escreve_pdf(caminho: Path, linhas: List[str]) -> None:
+    """PDF mínimo e válido com texto em Helvetica (uma página por 40 linhas)."""
+    def escapa(s: str) -> str:
+        s = s.encode("latin-1", "replace").decode("latin-1")
+        return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    paginas = [linhas[i:i + 40] for i in range(0, len(linhas), 40)] or [[""]]
+    objetos: List[bytes] = []
+    objetos.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(paginas)))
+    objetos.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(paginas)} >>".encode())
+    fonte = 3 + 2 * len(paginas)
+    for i, pagina in enumerate(paginas):
+        texto = "BT /F1 9 Tf 40 800 Td 12 TL " + " ".join(f"({escapa(l[:110])}) '" for l in pagina) + " ET"
+        conteudo = texto.encode("latin-1")
+        objetos.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {fonte} 0 R >> >> /Contents {4 + 2 * i} 0 R >>".encode()
+        )
+        objetos.append(f"<< /Length {len(conteudo)} >>\nstream\n".encode() + conteudo + b"\nendstream")
+    objetos.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    saida = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, obj in enumerate(objetos, start=1):
+        offsets.append(len(saida))
+        saida += f"{n} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(saida)
+    saida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+    saida += b"".join(f"{o:010d} 00000 n \n".encode() for o in offsets)
+    saida += f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    caminho.write_bytes(bytes(saida))
+
+
+def _escreve_docx(caminho: Path, paragrafos: List[str]) -> None:
+    """DOCX mínimo (OOXML) só com parágrafos de texto."""
+    from xml.sax.saxutils import escape
+    corpo = "".join(f"<w:p><w:r><w:t>{escape(p)}</w:t></w:r></w:p>" for p in paragrafos)
+    with zipfile.ZipFile(caminho, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml",
+                   '<?xml version="1.0" encoding="UTF-8"?>'
+                   '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                   '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                   '<Default Extension="xml" ContentType="application/xml"/>'
+                   '<Override PartName="/word/document.xml" '
+                   'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+                   '</Types>')
+        z.writestr("_rels/.rels",
+                   '<?xml version="1.0" encoding="UTF-8"?>'
+                   '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                   '<Relationship Id="rId1" '
+                   'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+                   'Target="word/document.xml"/></Relationships>')
+        z.writestr("word/document.xml",
+                   '<?xml version="1.0" encoding="UTF-8"?>'
+                   '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                   f"<w:body>{corpo}</w:body></w:document>")
+
+
+def _escreve_png(caminho: Path, linhas: List[str]) -> None:
+    """PNG com texto (Pillow, se instalado) ou um PNG liso gerado à mão."""
+    try:
+        from PIL import Image, ImageDraw  # lazy import
+        img = Image.new("RGB", (1200, 20 + 18 * len(linhas)), "white")
+        desenho = ImageDraw.Draw(img)
+        for i, linha in enumerate(linhas):
+            desenho.text((10, 10 + 18 * i), linha, fill="black")
+        img.save(caminho)
+        return
+    except Exception:
+        pass
+    largura, altura = 400, 200
+    bruto = b"".join(b"\x00" + b"\xff" * (largura * 3) for _ in range(altura))
+
+    def bloco(tipo: bytes, dados: bytes) -> bytes:
+        return struct.pack(">I", len(dados)) + tipo + dados + struct.pack(">I", zlib.crc32(tipo + dados))
+
+    caminho.write_bytes(
+        b"\x89PNG\r\n\x1a\n"
+        + bloco(b"IHDR", struct.pack(">IIBBBBB", largura, altura, 8, 2, 0, 0, 0))
+        + bloco(b"IDAT", zlib.compress(bruto))
+        + bloco(b"IEND", b"")
+    )
+
+
+def _escreve_html(caminho: Path, paragrafos: List[str]) -> None:
+    """Página "salva" com menu e rodapé repetidos, como um site real."""
+    menu = "<nav><a href='/'>Início</a> | <a href='/produtos'>Produtos</a> | <a href='/contato'>Contato</a></nav>"
+    rodape = "<footer>© 2025 Empresa Exemplo. Todos os direitos reservados. Política de privacidade.</footer>"
+    secoes = "".join(f"<section>{menu}<h2>Seção {i}</h2><p>{p}</p>{rodape}</section>" for i, p in enumerate(paragrafos))
+    caminho.write_text(
+        "<html><head><title>Exemplo</title><style>body{font-family:sans-serif}</style>"
+        "<script>var x = 1;</script></head>"
+        f"<body>{menu}{secoes}{rodape}</body></html>",
+        encoding="utf-8",
+    )
+
+
+def _escreve_wav(caminho: Path, segundos: float) -> None:
+    taxa = 16000
+    with wave.open(str(caminho), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(taxa)
+        quadros = b"".join(
+            struct.pack("<h", int(8000 * math.sin(2 * math.pi * 440 * i / taxa)))
+            for i in range(int(taxa * segundos))
+        )
+        w.writeframes(quadros)
+
+
+def gera_corpus(pasta: Path, escala: int = 1) -> Dict[str, Path]:
+    """Gera um arquivo de cada tipo suportado; `escala` multiplica o tamanho."""
+    pasta.mkdir(parents=True, exist_ok=True)
+    paragrafos = _paragrafos(60 * escala)
+    linhas = [l for p in paragrafos for l in (p[:100], p[100:200]) if l]
+
+    corpus = {
+        "txt": pasta / "documento.txt",
+        "csv": pasta / "tabela.csv",
+        "pdf": pasta / "documento.pdf",
+        "docx": pasta / "documento.docx",
+        "imagem": pasta / "imagem.png",
+        "html": pasta / "pagina.html",
+        "audio": pasta / "audio.wav",
+    }
+    corpus["txt"].write_text("\n\n".join(paragrafos), encoding="utf-8")
+    with corpus["csv"].open("w", encoding="utf-8", newline="") as f:
+        f.write("id,regiao,produto,quantidade,valor\n")
+        for i in range(500 * escala):
+            f.write(f"{i},Região {i % 5},Produto {i % 37},{i % 13 + 1},{(i * 7.31) % 1000:.2f}\n")
+    _escreve_pdf(corpus["pdf"], linhas)
+    _escreve_docx(corpus["docx"], paragrafos)
+    _escreve_png(corpus["imagem"], linhas[:20])
+    _escreve_html(corpus["html"], paragrafos)
+    _escreve_wav(corpus["audio"], 2.0 * escala)
+    return corpus
+
+
+# ---------------------------------------------------------------------
+# Backends falsos
+# ---------------------------------------------------------------------
+
+def _instala_youtube_falso(cues: int) -> None:
+    """Substitui youtube_transcript_api por um módulo local com legendas automáticas."""
+    modulo = types.ModuleType("youtube_transcript_api")
+    for nome in ("TranscriptsDisabled", "NoTranscriptFound", "VideoUnavailable",
+                 "TooManyRequests", "CouldNotRetrieveTranscript"):
+        setattr(modulo, nome, type(nome, (Exception,), {}))
+
+    legenda = [{"text": f"e então a gente {_FRASES[i % len(_FRASES)][:30].lower()}", "start": i * 2.0,
+                "duration": 2.0} for i in range(cues)]
+
+    class _Transcript:
+        def fetch(self):
+            return list(legenda)
+
+    class _Lista:
+        def find_manually_created_transcript(self, langs):
+            raise modulo.NoTranscriptFound()
+
+        def find_generated_transcript(self, langs):
+            return _Transcript()
+
+    class YouTubeTranscriptApi:
+        @staticmethod
+        def list_transcripts(video_id):
+            return _Lista()
+
+        @staticmethod
+        def get_transcript(video_id, languages=None):
+            return list(legenda)
+
+    modulo.YouTubeTranscriptApi = YouTubeTranscriptApi
+    sys.modules["youtube_transcript_api"] = modulo
+
+
+def _servidor_local(pasta: Path):
+    handler = partial(_HandlerSilencioso, directory=str(pasta))
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+class _HandlerSilencioso(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _modelo_falso(pedacos: int, atraso: float):
+    """Chat LangChain local que emite `pedacos` tokens com `atraso` entre eles."""
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+    class _Lento(GenericFakeChatModel):
+        def _stream(self, *args, **kwargs):
+            for pedaco in super()._stream(*args, **kwargs):
+                if atraso:
+                    time.sleep(atraso)
+                yield pedaco
+
+    resposta = " ".join(f"palavra{i}" for i in range(pedacos))
+    return _Lento(messages=iter([resposta] * 10_000))
+
+
+# ---------------------------------------------------------------------
+# Casos
+# ---------------------------------------------------------------------
+
+def _caso_loader(nome_funcao: str, chave: str):
+    def preparar(corpus):
+        import loaders
+        funcao = getattr(loaders, nome_funcao)
+        caminho = str(corpus[chave])
+
+        def rodar():
+            funcao.clear()  # mede o parsing, não o st.cache_data
+            return funcao(caminho)
+        return rodar, corpus[chave].stat().st_size
+    return preparar
+
+
+def _caso_site(corpus):
+    import loaders
+    servidor = _servidor_local(corpus["html"].parent)
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/{corpus['html'].name}"
+
+    def rodar():
+        loaders.carrega_site.clear()
+        return loaders.carrega_site(url)
+    return rodar, corpus["html"].stat().st_size
+
+
+def _sem_cota(provedor: str, endpoint: str) -> None:
+    # O backend é local: a cota real do limitador mediria só o token bucket
+    import limitador
+    limitador.configura(provedor, endpoint, por_minuto=1e9, simultaneas=64)
+
+
+def _caso_youtube(corpus):
+    _instala_youtube_falso(cues=1500)
+    _sem_cota("youtube", "transcript")
+    import loaders
+
+    def rodar():
+        loaders._try_transcript_text.clear()
+        return loaders.carrega_youtube("https://www.youtube.com/watch?v=abcdefghijk")
+    return rodar, 0
+
+
+def _caso_youtube_whisper(corpus):
+    """Fallback Whisper: yt-dlp e OpenAI falsos, áudio da fixture."""
+    _instala_youtube_falso(cues=0)
+    _sem_cota("youtube", "transcript")
+    _sem_cota("openai", "whisper")
+    sys.modules["youtube_transcript_api"].YouTubeTranscriptApi.get_transcript = staticmethod(lambda *a, **k: [])
+    audio = corpus["audio"]
+
+    class YoutubeDL:
+        def __init__(self, opts):
+            self.opts = opts
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=True):
+            vid = url.rsplit("=", 1)[-1]
+            shutil.copy(audio, f"{vid}.mp3")
+            return {"id": vid}
+
+    sys.modules["yt_dlp"] = types.SimpleNamespace(YoutubeDL=YoutubeDL)
+
+    class _Transcricoes:
+        def create(self, file, **kwargs):
+            return f"transcrição de {len(file.read())} bytes"
+
+    import loaders
+    loaders.cliente_openai = lambda *a, **k: types.SimpleNamespace(
+        audio=types.SimpleNamespace(transcriptions=_Transcricoes())
+    )
+    os.chdir(tempfile.mkdtemp())
+
+    def rodar():
+        loaders._try_transcript_text.clear()
+        return loaders.carrega_youtube("https://www.youtube.com/watch?v=abcdefghijk")
+    return rodar, audio.stat().st_size
+
+
+def _caso_chat(corpus, pedacos: int = 300, atraso: float = 0.0):
+    """Um turno completo de pagina_chat (AppTest) com documento registrado e LLM falso."""
+    from streamlit.testing.v1 import AppTest
+    from langchain.memory import ConversationBufferMemory
+    from documentos import RegistroDocumentos
+
+    texto = corpus["txt"].read_text(encoding="utf-8")
+    contador = {"n": 0}
+    preparados = []
+
+    def prepara_app():
+        at = AppTest.from_file(str(RAIZ / "Home.py"), default_timeout=120)
+        at.secrets["OPENAI_API_KEY"] = "benchmark"
+        at.secrets["GROQ_API_KEY"] = "benchmark"
+        registro = RegistroDocumentos()
+        registro.adiciona("Analisador de Texto", corpus["txt"].name, texto, lambda: texto)
+        at.session_state["documentos"] = registro
+        at.session_state["modelo_carregado"] = True
+        at.session_state["chain"] = object()
+        at.session_state["memoria"] = ConversationBufferMemory()
+        at.session_state["modelo_chat"] = _modelo_falso(pedacos, atraso)
+        at.run()
+        return at
+
+    def rodar():
+        at = preparados.pop() if preparados else prepara_app()
+        contador["n"] += 1
+        # Pergunta única por turno: o cache de respostas não pode responder no lugar do LLM
+        at.chat_input[0].set_value(f"resuma o documento, rodada {contador['n']}").run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        preparados.append(prepara_app())  # prepara o próximo fora da medição
+        return "ok"
+
+    preparados.append(prepara_app())
+    return rodar, len(texto.encode("utf-8"))
+
+
+def _caso_normalizacao(corpus):
+    """Normalização de uma página (menus/rodapés repetidos) e de legendas automáticas."""
+    import re
+    from normalizacao import normaliza_pagina, normaliza_transcricao
+
+    pagina = re.sub(r"<[^>]+>", "\n", corpus["html"].read_text(encoding="utf-8"))
+    legendas = "\n".join(f"e então a gente {_FRASES[i % len(_FRASES)][:30].lower()}" for i in range(1500))
+
+    def rodar():
+        return normaliza_pagina(pagina).texto and normaliza_transcricao(legendas).texto
+    return rodar, len(pagina.encode("utf-8")) + len(legendas.encode("utf-8"))
+
+
+CASOS: Dict[str, Callable] = {
+    "txt": _caso_loader("carrega_txt", "txt"),
+    "csv": _caso_loader("carrega_csv", "csv"),
+    "pdf": _caso_loader("carrega_pdf", "pdf"),
+    "docx": _caso_loader("carrega_docx", "docx"),
+    "imagem": _caso_loader("carrega_imagem", "imagem"),
+    "site": _caso_site,
+    "youtube": _caso_youtube,
+    "youtube_whisper": _caso_youtube_whisper,
+    "normalizacao": _caso_normalizacao,
+    "chat": _caso_chat,
+}
+
+
+# ---------------------------------------------------------------------
+# Medição
+# ---------------------------------------------------------------------
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    if not ordenados:
+        return float("nan")
+    k = (len(ordenados) - 1) * p / 100
+    i, f = int(math.floor(k)), k - math.floor(k)
+    return ordenados[i] if i + 1 >= len(ordenados) else ordenados[i] * (1 - f) + ordenados[i + 1] * f
+
+
+def _pico_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return round(pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024, 1)
+
+
+def executa_caso(nome: str, pasta: Path, escala: int, repeticoes: int, aquecimento: int) -> dict:
+    """Roda um caso no processo atual (chamado dentro do subprocesso)."""
+    sys.path.insert(0, str(RAIZ))
+    corpus = gera_corpus(pasta, escala)
+    rodar, tamanho = CASOS[nome](corpus)
+
+    erro = None
+    for _ in range(aquecimento):
+        try:
+            rodar()
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+            break
+
+    tempos: List[float] = []
+    if erro is None:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            try:
+                resultado = rodar()
+            except Exception as e:
+                erro = f"{type(e).__name__}: {e}"
+                break
+            tempos.append(time.perf_counter() - inicio)
+            if not resultado:
+                # Os loaders mostram st.error e devolvem None quando falham fora do Streamlit
+                erro = "loader não devolveu texto (dependência ausente?)"
+                break
+
+    total = sum(tempos)
+    return {
+        "caso": nome,
+        "repeticoes": len(tempos),
+        "p50_ms": round(_percentil(tempos, 50) * 1000, 2) if tempos else None,
+        "p95_ms": round(_percentil(tempos, 95) * 1000, 2) if tempos else None,
+        "p99_ms": round(_percentil(tempos, 99) * 1000, 2) if tempos else None,
+        "media_ms": round(total / len(tempos) * 1000, 2) if tempos else None,
+        "ops_s": round(len(tempos) / total, 2) if total else None,
+        "mb_s": round(tamanho * len(tempos) / total / 1e6, 3) if total and tamanho else None,
+        "pico_rss_mb": _pico_rss_mb(),
+        "erro": erro,
+    }
+
+
+def _roda_em_subprocesso(nome: str, args) -> dict:
+    pasta = Path(tempfile.mkdtemp(prefix=f"automazze-bench-{nome}-"))
+    try:
+        proc = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), "--_caso", nome, "--_pasta", str(pasta),
+             "--escala", str(args.escala), "--repeticoes", str(args.repeticoes),
+             "--aquecimento", str(args.aquecimento)],
+            capture_output=True, text=True, cwd=str(RAIZ),
+        )
+        ultima = (proc.stdout.strip().splitlines() or [""])[-1]
+        try:
+            return json.loads(ultima)
+        except ValueError:
+            return {"caso": nome, "erro": (proc.stderr.strip().splitlines() or ["falhou"])[-1]}
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------
+# Relatório e baseline
+# ---------------------------------------------------------------------
+
+def compara(resultados: List[dict], baseline: Dict[str, dict], tolerancia: float) -> List[str]:
+    """Casos cujo p50 ou p95 piorou mais que `tolerancia` em relação à baseline."""
+    regressoes = []
+    for r in resultados:
+        base = baseline.get(r["caso"])
+        if not base or r.get("erro"):
+            continue
+        for metrica in ("p50_ms", "p95_ms"):
+            atual, anterior = r.get(metrica), base.get(metrica)
+            if atual is None or not anterior:
+                continue
+            r[f"{metrica}_delta"] = round((atual - anterior) / anterior * 100, 1)
+            if atual > anterior * (1 + tolerancia):
+                regressoes.append(f"{r['caso']}: {metrica} {anterior} -> {atual} ms")
+    return regressoes
+
+
+def imprime(resultados: List[dict]) -> None:
+    colunas = ["caso", "p50_ms", "p95_ms", "p99_ms", "ops_s", "mb_s", "pico_rss_mb", "p50_ms_delta"]
+    linhas = [[str(r.get(c, "") if r.get(c) is not None else "-") for c in colunas] for r in resultados]
+    larguras = [max(len(c), *(len(l[i]) for l in linhas)) for i, c in enumerate(colunas)]
+    print("  ".join(c.ljust(w) for c, w in zip(colunas, larguras)))
+    for r, linha in zip(resultados, linhas):
+        print("  ".join(v.ljust(w) for v, w in zip(linha, larguras)), end="")
+        print(f"  ERRO: {r['erro']}" if r.get("erro") else "")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark offline do autoMazze")
+    parser.add_argument("--casos", default=",".join(CASOS), help="lista separada por vírgulas")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--aquecimento", type=int, default=1)
+    parser.add_argument("--escala", type=int, default=1, help="multiplica o tamanho das fixtures")
+    parser.add_argument("--baseline", default=str(BASELINE_PADRAO))
+    parser.add_argument("--salvar-baseline", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=0.20, help="piora aceitável (0.20 = 20%%)")
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    parser.add_argument("--_caso", help=argparse.SUPPRESS)
+    parser.add_argument("--_pasta", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args._caso:
+        resultado = executa_caso(args._caso, Path(args._pasta), args.escala, args.repeticoes, args.aquecimento)
+        print(json.dumps(resultado, ensure_ascii=False))
+        return 0
+
+    nomes = [n.strip() for n in args.casos.split(",") if n.strip()]
+    desconhecidos = [n for n in nomes if n not in CASOS]
+    if desconhecidos:
+        parser.error(f"casos desconhecidos: {', '.join(desconhecidos)}")
+
+    resultados = [_roda_em_subprocesso(nome, args) for nome in nomes]
+
+    baseline_path = Path(args.baseline)
+    regressoes: List[str] = []
+    if args.salvar_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(
+            {r["caso"]: r for r in resultados if not r.get("erro")}, indent=2, ensure_ascii=False
+        ), encoding="utf-8")
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        regressoes = compara(resultados, baseline, args.tolerancia)
+
+    imprime(resultados)
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.salvar_baseline:
+        print(f"\nBaseline gravada em {baseline_path}")
+    if regressoes:
+        print("\nRegressões acima de {:.0f}%:".format(args.tolerancia * 100))
+        for r in regressoes:
+            print(f"  - {r}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+# cache_respostas.py
+# Cache de respostas compartilhado pelo processo: perguntas repetidas sobre os
+# mesmos documentos (ex.: "resuma") são respondidas sem nova chamada ao LLM.
+
+import hashlib
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+
+# ---------------------------------------------------------------------
+# Normalização e similaridade
+# ---------------------------------------------------------------------
+
+def normaliza_pergunta(texto: str) -> str:
+    """Minúsculas, sem acentos, sem pontuação e com espaços colapsados."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r"[^\w\s]", " ", texto.lower())
+    return re.sub(r"\s+", " ", texto).strip()
+
+
+def _vetoriza(texto_normalizado: str) -> Counter:
+    """Trigramas de caracteres + palavras, suficiente para pegar variações curtas."""
+    vetor = Counter(texto_normalizado.split())
+    s = f" {texto_normalizado} "
+    vetor.update(s[i:i + 3] for i in range(len(s) - 2))
+    return vetor
+
+
+def _cosseno(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    menor, maior = (a, b) if len(a) < len(b) else (b, a)
+    dot = sum(v * maior.get(k, 0) for k, v in menor.items())
+    na = math.sqrt(sum(v * v for v in a.values()))
+    nb = math.sqrt(sum(v * v for v in b.values()))
+    return dot / (na * nb)
+
+
+def _numeros(texto_normalizado: str) -> frozenset:
+    # "resuma a página 3" e "resuma a página 4" não podem ser tratadas como iguais
+    return frozenset(re.findall(r"\d+", texto_normalizado))
+
+
+# Palavras que não mudam o sentido da pergunta; negações ("nao", "nem", "sem") ficam de fora
+_STOPWORDS = frozenset("""
+a o as os um uma uns umas de do da dos das no na nos nas em ao aos por pelo pela pelos pelas
+para pra com e ou que qual quais se me te lhe isso isto esse essa este esta aquele aquela
+sao sobre ai aqui favor poderia pode voce vc the of to in on is are what which
+""".split())
+
+
+def _palavras_de_conteudo(texto_normalizado: str) -> frozenset:
+    """Palavras que precisam coincidir para duas perguntas serem tratadas como iguais."""
+    return frozenset(p for p in texto_normalizado.split() if p not in _STOPWORDS)
+
+
+def _conteudo(mensagem) -> str:
+    return getattr(mensagem, "content", mensagem) or ""
+
+
+# ---------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------
+
+@dataclass
+class _Entrada:
+    grupo: str
+    pergunta: str
+    resposta: str
+    vetor: Counter
+    numeros: frozenset
+    palavras: frozenset
+    criado_em: float = field(default_factory=time.time)
+
+
+class CacheRespostas:
+    """
+    Chave: (hash dos documentos, modelo, pergunta normalizada, histórico).
+    Opcionalmente (`limiar_similaridade`) aceita perguntas quase iguais dentro do
+    mesmo grupo (mesmos documentos, modelo e histórico) via similaridade de
+    cosseno, desde que as palavras de conteúdo sejam as mesmas: "vantagens" x
+    "desvantagens" ou "menciona" x "nao menciona" nunca são aproximadas.
+    """
+
+    def __init__(
+        self,
+        max_itens: int = 512,
+        ttl: float = 60 * 60 * 6,
+        limiar_similaridade: Optional[float] = None,
+    ) -> None:
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.limiar_similaridade = limiar_similaridade
+        self._itens: "OrderedDict[str, _Entrada]" = OrderedDict()
+        self._grupos: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.acertos_aproximados = 0
+        self.falhas = 0
+
+    def _grupo(self, doc_hashes: Iterable[str], modelo: str, historico: Sequence) -> str:
+        # Histórico inteiro: o modelo recebe todas as mensagens, e o cache é compartilhado entre sessões
+        partes = [",".join(sorted(doc_hashes)), modelo or ""]
+        partes += [f"{getattr(m, 'type', '')}:{_conteudo(m)}" for m in historico]
+        return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+    def _remove(self, chave: str) -> None:
+        entrada = self._itens.pop(chave, None)
+        if entrada is None:
+            return
+        membros = self._grupos.get(entrada.grupo)
+        if membros is not None:
+            membros.discard(chave)
+            if not membros:
+                del self._grupos[entrada.grupo]
+
+    def _expirada(self, entrada: _Entrada, agora: float) -> bool:
+        return self.ttl is not None and agora - entrada.criado_em > self.ttl
+
+    def busca(
+        self,
+        doc_hashes: Iterable[str],
+        modelo: str,
+        pergunta: str,
+        historico: Sequence = (),
+    ) -> Optional[str]:
+        grupo = self._grupo(doc_hashes, modelo, historico)
+        normalizada = normaliza_pergunta(pergunta)
+        chave = f"{grupo}:{normalizada}"
+        agora = time.time()
+
+        with self._lock:
+            entrada = self._itens.get(chave)
+            if entrada is not None and self._expirada(entrada, agora):
+                self._remove(chave)
+                entrada = None
+            if entrada is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return entrada.resposta
+
+            if self.limiar_similaridade is not None:
+                vetor = _vetoriza(normalizada)
+                numeros = _numeros(normalizada)
+                palavras = _palavras_de_conteudo(normalizada)
+                melhor, melhor_score = None, self.limiar_similaridade
+                for outra in list(self._grupos.get(grupo, ())):
+                    candidata = self._itens[outra]
+                    if self._expirada(candidata, agora):
+                        self._remove(outra)
+                        continue
+                    if candidata.numeros != numeros or candidata.palavras != palavras:
+                        continue
+                    score = _cosseno(vetor, candidata.vetor)
+                    if score >= melhor_score:
+                        melhor, melhor_score = outra, score
+                if melhor is not None:
+                    self._itens.move_to_end(melhor)
+                    self.acertos_aproximados += 1
+                    return self._itens[melhor].resposta
+
+            self.falhas += 1
+            return None
+
+    def guarda(
+        self,
+        doc_hashes: Iterable[str],
+        modelo: str,
+        pergunta: str,
+        historico: Sequence,
+        resposta: str,
+    ) -> None:
+        if not isinstance(resposta, str) or not resposta:
+            return
+        grupo = self._grupo(doc_hashes, modelo, historico)
+        normalizada = normaliza_pergunta(pergunta)
+        chave = f"{grupo}:{normalizada}"
+
+        with self._lock:
+            self._remove(chave)
+            self._itens[chave] = _Entrada(
+                grupo=grupo,
+                pergunta=normalizada,
+                resposta=resposta,
+                vetor=_vetoriza(normalizada),
+                numeros=_numeros(normalizada),
+                palavras=_palavras_de_conteudo(normalizada),
+            )
+            self._grupos.setdefault(grupo, set()).add(chave)
+            while len(self._itens) > self.max_itens:
+                self._remove(next(iter(self._itens)))
+
+    def limpa(self) -> None:
+        with self._lock:
+            self._itens.clear()
+            self._grupos.clear()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "acertos": self.acertos,
+                "acertos_aproximados": self.acertos_aproximados,
+                "falhas": self.falhas,
+            }
+
+
+def reproduz_resposta(texto: str, palavras_por_bloco: int = 3) -> Iterator[str]:
+    """Reenvia uma resposta em cache em pedaços, para o mesmo st.write_stream."""
+    pedacos = re.split(r"(\s+)", texto)
+    passo = palavras_por_bloco * 2
+    for i in range(0, len(pedacos), passo):
+        yield "".join(pedacos[i:i + passo])
+
+
+CACHE_RESPOSTAS = CacheRespostas()
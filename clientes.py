@@ -0,0 +1,135 @@
+# clientes.py
+# Registro de clientes do processo: instâncias de chat (ChatOpenAI/ChatGroq) e o
+# cliente OpenAI são criados uma vez por provedor/modelo/configuração e reutilizam
+# o mesmo pool HTTP (conexões keep-alive) entre sessões.
+
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Conexões por provedor; as chamadas simultâneas já são limitadas pelo limitador.py
+LIMITE_CONEXOES = 32
+LIMITE_KEEPALIVE = 16
+KEEPALIVE_SEGUNDOS = 120.0
+
+_HTTP: Dict[str, Any] = {}
+_INSTANCIAS: Dict[Tuple, Any] = {}
+_ESTATISTICAS: Dict[str, Dict[str, int]] = {}
+_LOCK = threading.Lock()
+
+
+def _hash_chave(api_key: Optional[str]) -> str:
+    # A chave entra na identidade do cliente sem ficar exposta nas estatísticas
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+def _conta(provedor: str, evento: str) -> None:
+    contadores = _ESTATISTICAS.setdefault(provedor, {"criados": 0, "reutilizados": 0})
+    contadores[evento] += 1
+
+
+def http_client(provedor: str):
+    """httpx.Client compartilhado do provedor (pool de conexões keep-alive)."""
+    provedor = provedor.lower()
+    with _LOCK:
+        if provedor not in _HTTP:
+            import httpx  # lazy import
+            _HTTP[provedor] = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=LIMITE_CONEXOES,
+                    max_keepalive_connections=LIMITE_KEEPALIVE,
+                    keepalive_expiry=KEEPALIVE_SEGUNDOS,
+                ),
+                timeout=httpx.Timeout(120.0, connect=10.0),
+            )
+        return _HTTP[provedor]
+
+
+def _obtem(chave: Tuple, provedor: str, fabrica):
+    with _LOCK:
+        instancia = _INSTANCIAS.get(chave)
+        if instancia is not None:
+            _conta(provedor, "reutilizados")
+            return instancia
+    # Criado fora do lock: construir o cliente pode ser lento
+    instancia = fabrica()
+    with _LOCK:
+        if chave in _INSTANCIAS:
+            _conta(provedor, "reutilizados")
+            return _INSTANCIAS[chave]
+        _INSTANCIAS[chave] = instancia
+        _conta(provedor, "criados")
+        return instancia
+
+
+def cliente_chat(classe, provedor: str, modelo: str, api_key: str, **config):
+    """
+    Chat LangChain reutilizável para (provedor, modelo, configuração).
+    As retentativas do SDK ficam desligadas: quem retenta é o limitador/roteador.
+    """
+    config.setdefault("max_retries", 0)
+    chave = ("chat", provedor.lower(), modelo, _hash_chave(api_key), tuple(sorted(config.items())))
+    return _obtem(chave, provedor.lower(), lambda: classe(
+        model=modelo,
+        api_key=api_key,
+        http_client=http_client(provedor),
+        **config,
+    ))
+
+
+def cliente_openai(api_key: Optional[str] = None, **config):
+    """openai.OpenAI reutilizável; sem api_key usa a variável OPENAI_API_KEY."""
+    config.setdefault("max_retries", 0)
+    chave = ("openai", "openai", _hash_chave(api_key), tuple(sorted(config.items())))
+
+    def _cria():
+        from openai import OpenAI  # lazy import
+        return OpenAI(api_key=api_key, http_client=http_client("openai"), **config)
+
+    return _obtem(chave, "openai", _cria)
+
+
+def _conexoes(client) -> Tuple[int, int]:
+    """(conexões abertas, ociosas) do pool httpcore; melhor esforço."""
+    try:
+        conexoes = list(client._transport._pool.connections)
+    except Exception:
+        return 0, 0
+    ociosas = 0
+    for c in conexoes:
+        try:
+            ociosas += int(c.is_idle())
+        except Exception:
+            pass
+    return len(conexoes), ociosas
+
+
+def estatisticas() -> List[dict]:
+    with _LOCK:
+        provedores = sorted(set(_HTTP) | set(_ESTATISTICAS))
+        linhas = []
+        for provedor in provedores:
+            contadores = _ESTATISTICAS.get(provedor, {"criados": 0, "reutilizados": 0})
+            abertas, ociosas = _conexoes(_HTTP[provedor]) if provedor in _HTTP else (0, 0)
+            linhas.append({
+                "provedor": provedor,
+                "clientes": sum(1 for k in _INSTANCIAS if k[1] == provedor),
+                "criados": contadores["criados"],
+                "reutilizados": contadores["reutilizados"],
+                "conexoes_abertas": abertas,
+                "conexoes_ociosas": ociosas,
+            })
+        return linhas
+
+
+def fecha_todos() -> None:
+    """Fecha os pools HTTP (útil em scripts e no fim de processos em lote)."""
+    with _LOCK:
+        for client in _HTTP.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+        _HTTP.clear()
+        _INSTANCIAS.clear()
@@ -0,0 +1,120 @@
+# documentos.py
+# Registro de documentos por sessão: cada arquivo/URL é carregado uma única vez
+# e depois consultado quantas vezes for preciso, sem novo parsing.
+
+import hashlib
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+
+# ---------------------------------------------------------------------
+# Utilidades
+# ---------------------------------------------------------------------
+
+def hash_conteudo(conteudo: Union[bytes, str]) -> str:
+    """SHA-256 do conteúdo bruto (bytes do arquivo ou a própria URL)."""
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode("utf-8")
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def estima_tokens(texto: str) -> int:
+    """Estimativa local e barata (~4 caracteres por token)."""
+    if not texto:
+        return 0
+    return int(math.ceil(len(texto) / 4))
+
+
+# ---------------------------------------------------------------------
+# Registro
+# ---------------------------------------------------------------------
+
+@dataclass
+class Documento:
+    id: str
+    tipo: str
+    nome: str
+    hash: str
+    texto: str
+    tokens: int
+    indice: int
+    tokens_economizados: int = 0
+    criado_em: float = field(default_factory=time.time)
+
+
+class RegistroDocumentos:
+    """Documentos já processados de uma sessão, indexados pelo hash do conteúdo."""
+
+    def __init__(self) -> None:
+        self._documentos: Dict[str, Documento] = {}
+        self._proximo_indice = 0
+
+    def __len__(self) -> int:
+        return len(self._documentos)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._documentos
+
+    def adiciona(
+        self,
+        tipo: str,
+        nome: str,
+        conteudo: Union[bytes, str],
+        carregador: Callable[[], str],
+        normalizador: Optional[Callable[[str], str]] = None,
+    ) -> Documento:
+        """
+        Registra um documento. Se o mesmo conteúdo já estiver no registro,
+        devolve o existente sem chamar o carregador novamente.
+        O `normalizador`, se houver, roda uma vez sobre o texto carregado.
+        """
+        digest = hash_conteudo(conteudo)
+        doc_id = digest[:12]
+        existente = self._documentos.get(doc_id)
+        if existente is not None:
+            return existente
+
+        bruto = carregador() or ""
+        texto = normalizador(bruto) if normalizador else bruto
+        documento = Documento(
+            id=doc_id,
+            tipo=tipo,
+            nome=nome,
+            hash=digest,
+            texto=texto,
+            tokens=estima_tokens(texto),
+            indice=self._proximo_indice,
+            tokens_economizados=max(0, estima_tokens(bruto) - estima_tokens(texto)),
+        )
+        self._proximo_indice += 1
+        self._documentos[doc_id] = documento
+        return documento
+
+    def remove(self, doc_id: str) -> Optional[Documento]:
+        return self._documentos.pop(doc_id, None)
+
+    def limpa(self) -> None:
+        self._documentos.clear()
+
+    def obtem(self, doc_id: str) -> Optional[Documento]:
+        return self._documentos.get(doc_id)
+
+    def lista(self) -> List[Documento]:
+        return sorted(self._documentos.values(), key=lambda d: d.indice)
+
+    def seleciona(self, ids: Optional[Iterable[str]] = None) -> List[Documento]:
+        """Todos os documentos (ids=None) ou apenas o subconjunto pedido."""
+        if ids is None:
+            return self.lista()
+        escolhidos = set(ids)
+        return [d for d in self.lista() if d.id in escolhidos]
+
+
+def monta_contexto(documentos: Iterable[Documento]) -> str:
+    """Concatena os textos dos documentos com um cabeçalho por documento."""
+    partes = []
+    for d in documentos:
+        partes.append(f"### Documento {d.indice + 1}: {d.nome} ({d.tipo})\n\n{d.texto}")
+    return "\n\n---\n\n".join(partes)
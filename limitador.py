@@ -0,0 +1,323 @@
+# limitador.py
+# Limitador de taxa e de concorrência compartilhado pelo processo para as
+# chamadas externas (LLMs, Whisper, YouTube): token bucket por provedor/endpoint
+# com fila FIFO, backoff com jitter, orçamento de retentativas e métricas.
+
+import random
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+# ---------------------------------------------------------------------
+# Classificação de erros
+# ---------------------------------------------------------------------
+
+def _status(erro: BaseException) -> Optional[int]:
+    status = getattr(erro, "status_code", None)
+    if status is None:
+        status = getattr(getattr(erro, "response", None), "status_code", None)
+    return status
+
+
+def e_limitado(erro: BaseException) -> bool:
+    """O provedor recusou por excesso de requisições (429)."""
+    if _status(erro) == 429:
+        return True
+    nome = type(erro).__name__.lower()
+    return "ratelimit" in nome or "toomanyrequests" in nome
+
+
+def _e_falha_de_conexao(erro: BaseException) -> bool:
+    """Conexão recusada/derrubada (ex.: keep-alive do pool já fechado pelo servidor)."""
+    if isinstance(erro, ConnectionError):
+        return True
+    # Sem importar os SDKs: se a exceção veio deles, o módulo já está carregado
+    httpx = sys.modules.get("httpx")
+    if httpx is not None and isinstance(erro, httpx.TransportError):
+        return True
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(erro, openai.APIConnectionError)
+
+
+def e_retentavel(erro: BaseException) -> bool:
+    """429, timeouts, falhas de conexão e sobrecarga do provedor justificam tentar de novo."""
+    if e_limitado(erro):
+        return True
+    if _status(erro) in (408, 409, 500, 502, 503, 504):
+        return True
+    if isinstance(erro, TimeoutError) or _e_falha_de_conexao(erro):
+        return True
+    return "timeout" in type(erro).__name__.lower()
+
+
+def retry_after(erro: BaseException) -> Optional[float]:
+    """Valor do cabeçalho Retry-After (em segundos), quando o provedor informa."""
+    headers = getattr(getattr(erro, "response", None), "headers", None) or {}
+    try:
+        valor = headers.get("retry-after") or headers.get("Retry-After")
+        return float(valor) if valor is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------
+# Orçamento de retentativas
+# ---------------------------------------------------------------------
+
+class OrcamentoRetentativas:
+    """
+    Cada sucesso deposita uma fração de ficha e cada retentativa gasta uma ficha:
+    quando o provedor está instável, as retentativas param antes de virar avalanche.
+    """
+
+    def __init__(self, proporcao: float = 0.2, maximo: float = 10.0) -> None:
+        self.proporcao = proporcao
+        self.maximo = maximo
+        self._fichas = maximo
+        self._lock = threading.Lock()
+
+    def sucesso(self) -> None:
+        with self._lock:
+            self._fichas = min(self.maximo, self._fichas + self.proporcao)
+
+    def gasta(self) -> bool:
+        with self._lock:
+            if self._fichas < 1:
+                return False
+            self._fichas -= 1
+            return True
+
+
+# ---------------------------------------------------------------------
+# Limitador
+# ---------------------------------------------------------------------
+
+class Limitador:
+    """Token bucket (requisições por minuto) + limite de chamadas simultâneas, em ordem FIFO."""
+
+    def __init__(
+        self,
+        nome: str,
+        por_minuto: float,
+        simultaneas: int,
+        rajada: Optional[float] = None,
+        backoff_base: float = 0.5,
+        backoff_teto: float = 20.0,
+    ) -> None:
+        self.nome = nome
+        self.taxa = por_minuto / 60.0
+        self.capacidade = rajada if rajada is not None else max(1.0, min(por_minuto / 10.0, 20.0))
+        self.simultaneas = simultaneas
+        self.backoff_base = backoff_base
+        self.backoff_teto = backoff_teto
+        self.orcamento = OrcamentoRetentativas()
+
+        self._cond = threading.Condition()
+        self._fila: deque = deque()
+        self._fichas = self.capacidade
+        self._atualizado = time.monotonic()
+        self._em_uso = 0
+        self._pausa_ate = 0.0
+
+        self.chamadas = 0
+        self.erros = 0
+        self.limitadas = 0
+        self.retentativas = 0
+        self.sem_orcamento = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.tempo_chamada_total = 0.0
+
+    # -- fila e fichas -------------------------------------------------
+
+    def _reabastece(self, agora: float) -> None:
+        self._fichas = min(self.capacidade, self._fichas + (agora - self._atualizado) * self.taxa)
+        self._atualizado = agora
+
+    def _adquire(self) -> float:
+        ticket = object()
+        inicio = time.monotonic()
+        with self._cond:
+            self._fila.append(ticket)
+            try:
+                while True:
+                    agora = time.monotonic()
+                    self._reabastece(agora)
+                    na_vez = self._fila[0] is ticket and self._em_uso < self.simultaneas
+                    if na_vez and agora >= self._pausa_ate and self._fichas >= 1:
+                        self._fichas -= 1
+                        self._em_uso += 1
+                        self._fila.popleft()
+                        self._cond.notify_all()
+                        break
+                    espera = None
+                    if na_vez:
+                        espera = max(self._pausa_ate - agora, (1 - self._fichas) / self.taxa, 0.001)
+                    self._cond.wait(espera)
+            except BaseException:
+                if ticket in self._fila:
+                    self._fila.remove(ticket)
+                    self._cond.notify_all()
+                raise
+        return time.monotonic() - inicio
+
+    def _libera(self) -> None:
+        with self._cond:
+            self._em_uso -= 1
+            self._cond.notify_all()
+
+    def penaliza(self, segundos: Optional[float] = None) -> None:
+        """Suspende novas chamadas por um tempo (ex.: após 429), para todas as sessões."""
+        with self._cond:
+            self._pausa_ate = max(self._pausa_ate, time.monotonic() + (segundos or self.backoff_base * 2))
+            self._cond.notify_all()
+
+    def _backoff(self, tentativa: int, erro: BaseException) -> float:
+        # Full jitter, respeitando o Retry-After quando existir
+        janela = min(self.backoff_teto, self.backoff_base * (2 ** tentativa))
+        return max(retry_after(erro) or 0.0, random.uniform(0, janela))
+
+    def _deve_retentar(self, erro: BaseException, tentativa: int, tentativas: int,
+                       retentavel: Callable[[BaseException], bool]) -> bool:
+        if not retentavel(erro) or tentativa + 1 >= tentativas:
+            return False
+        if not self.orcamento.gasta():
+            with self._cond:
+                self.sem_orcamento += 1
+            return False
+        with self._cond:
+            self.retentativas += 1
+        return True
+
+    # -- API -----------------------------------------------------------
+
+    @contextmanager
+    def chamada(self) -> Iterator[None]:
+        """Ocupa uma vaga (fila + ficha + concorrência) durante o bloco."""
+        espera = self._adquire()
+        inicio = time.monotonic()
+        erro = False
+        try:
+            yield
+        except Exception as e:
+            erro = True
+            if e_limitado(e):
+                with self._cond:
+                    self.limitadas += 1
+                self.penaliza(retry_after(e))
+            raise
+        finally:
+            duracao = time.monotonic() - inicio
+            with self._cond:
+                self.chamadas += 1
+                self.erros += int(erro)
+                self.espera_total += espera
+                self.espera_max = max(self.espera_max, espera)
+                self.tempo_chamada_total += duracao
+            self._libera()
+
+    def executa(
+        self,
+        funcao: Callable[[], T],
+        tentativas: int = 4,
+        retentavel: Callable[[BaseException], bool] = e_retentavel,
+    ) -> T:
+        """Executa `funcao` dentro do limite, com backoff e orçamento de retentativas."""
+        tentativa = 0
+        while True:
+            try:
+                with self.chamada():
+                    resultado = funcao()
+                self.orcamento.sucesso()
+                return resultado
+            except Exception as e:
+                if not self._deve_retentar(e, tentativa, tentativas, retentavel):
+                    raise
+                time.sleep(self._backoff(tentativa, e))
+                tentativa += 1
+
+    def stream(
+        self,
+        fabrica: Callable[[], Iterator[T]],
+        tentativas: int = 3,
+        retentavel: Callable[[BaseException], bool] = e_retentavel,
+    ) -> Iterator[T]:
+        """Como `executa`, para respostas em streaming: só retenta antes do primeiro pedaço."""
+        tentativa = 0
+        while True:
+            iniciou = False
+            try:
+                with self.chamada():
+                    for pedaco in fabrica():
+                        iniciou = True
+                        yield pedaco
+                self.orcamento.sucesso()
+                return
+            except Exception as e:
+                if iniciou or not self._deve_retentar(e, tentativa, tentativas, retentavel):
+                    raise
+                time.sleep(self._backoff(tentativa, e))
+                tentativa += 1
+
+    def metricas(self) -> dict:
+        with self._cond:
+            n = max(self.chamadas, 1)
+            return {
+                "limitador": self.nome,
+                "chamadas": self.chamadas,
+                "erros": self.erros,
+                "429": self.limitadas,
+                "retentativas": self.retentativas,
+                "sem_orcamento": self.sem_orcamento,
+                "em_uso": self._em_uso,
+                "na_fila": len(self._fila),
+                "espera_media_s": round(self.espera_total / n, 3),
+                "espera_max_s": round(self.espera_max, 3),
+                "chamada_media_s": round(self.tempo_chamada_total / n, 3),
+            }
+
+
+# ---------------------------------------------------------------------
+# Registro do processo
+# ---------------------------------------------------------------------
+
+# (provedor, endpoint) -> (requisições por minuto, chamadas simultâneas)
+LIMITES_PADRAO: Dict[Tuple[str, str], Tuple[float, int]] = {
+    ("openai", "chat"): (500, 16),
+    ("openai", "whisper"): (50, 4),
+    ("groq", "chat"): (30, 8),
+    ("youtube", "transcript"): (20, 2),
+}
+
+_LIMITADORES: Dict[Tuple[str, str], Limitador] = {}
+_LOCK = threading.Lock()
+
+
+def configura(provedor: str, endpoint: str, por_minuto: float, simultaneas: int) -> Limitador:
+    """Define (ou redefine) a cota de um provedor/endpoint."""
+    chave = (provedor.lower(), endpoint)
+    with _LOCK:
+        _LIMITADORES[chave] = Limitador(f"{chave[0]}/{endpoint}", por_minuto, simultaneas)
+        return _LIMITADORES[chave]
+
+
+def limitador(provedor: str, endpoint: str) -> Limitador:
+    """Limitador único do processo para o provedor/endpoint (criado sob demanda)."""
+    chave = (provedor.lower(), endpoint)
+    with _LOCK:
+        if chave not in _LIMITADORES:
+            por_minuto, simultaneas = LIMITES_PADRAO.get(chave, (60, 4))
+            _LIMITADORES[chave] = Limitador(f"{chave[0]}/{endpoint}", por_minuto, simultaneas)
+        return _LIMITADORES[chave]
+
+
+def metricas() -> List[dict]:
+    with _LOCK:
+        limitadores = list(_LIMITADORES.values())
+    return [l.metricas() for l in limitadores]
@@ -1,24 +1,44 @@
 # loaders.py
 # Versão robusta (compatível Python 3.9+), com lazy imports para evitar ImportError
 # e com pipeline YouTube -> Transcript (manual/auto) -> Fallback Whisper (yt-dlp + OpenAI)
+#
+# As funções extrai_* não dependem da interface: levantam ErroCarregamento e podem
+# ser usadas fora do Streamlit (lote.py). As carrega_* são as versões da interface,
+# com cache e mensagem de erro na página.
 
 import os
 import re
 import io
-from typing import Optional
+from typing import Callable, Optional
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 
 import streamlit as st
 
+from clientes import cliente_openai
+from limitador import e_retentavel, limitador
+from metricas import medir
+
 
 # ---------------------------------------------------------------------
 # Utilidades
 # ---------------------------------------------------------------------
 
+class ErroCarregamento(RuntimeError):
+    """Falha ao extrair o texto de um documento (mensagem pronta para o usuário)."""
+
+
 def _ensure_path_exists(path: str) -> None:
     if not os.path.exists(path):
-        st.error(f"Arquivo não encontrado: {path}")
+        raise ErroCarregamento(f"Arquivo não encontrado: {path}")
+
+
+def _na_interface(extrator: Callable[..., str], *args, **kwargs) -> str:
+    """Executa um extrator mostrando o erro na página e interrompendo o script."""
+    try:
+        return extrator(*args, **kwargs)
+    except ErroCarregamento as e:
+        st.error(str(e))
         st.stop()
 
 
@@ -31,23 +51,22 @@ def _docling_to_text(source: str) -> str:
             "Pacote 'docling' não instalado ou com erro. Adicione 'docling' ao requirements.txt"
         ) from e
 
-    converter = DocumentConverter()
-    result = converter.convert(source)
-    return result.document.export_to_text()
+    with medir("docling"):
+        converter = DocumentConverter()
+        result = converter.convert(source)
+        return result.document.export_to_text()
 
 
 # ---------------------------------------------------------------------
 # Loader de SITES (URL)
 # ---------------------------------------------------------------------
 
-@st.cache_data(show_spinner=False, ttl=60 * 60)
-def carrega_site(url: str) -> str:
+def extrai_site(url: str) -> str:
     """
     Tenta Docling direto; se falhar, faz fallback com requests + limpeza simples de HTML.
     """
     if not url or not isinstance(url, str):
-        st.error("URL inválida.")
-        st.stop()
+        raise ErroCarregamento("URL inválida.")
 
     # 1) Tenta Docling (suporta URL remota)
     try:
@@ -64,7 +83,8 @@ def carrega_site(url: str) -> str:
             headers = {"User-Agent": "Mozilla/5.0"}
 
         import requests  # lazy import
-        resp = requests.get(url, headers=headers, timeout=25)
+        with medir("site_requests"):
+            resp = requests.get(url, headers=headers, timeout=25)
         resp.raise_for_status()
         html = resp.text
 
@@ -76,53 +96,49 @@ def carrega_site(url: str) -> str:
         text = re.sub(r"\n\s+", "\n", text)
         text = re.sub(r"[ \t]{2,}", " ", text)
         text = text.strip()
+    except Exception as e:
+        raise ErroCarregamento("Não foi possível carregar o site. Verifique a URL e tente novamente.") from e
 
-        if not text:
-            st.error("Não foi possível extrair texto da página.")
-            st.stop()
-        return text
-    except Exception:
-        st.error("Não foi possível carregar o site. Verifique a URL e tente novamente.")
-        st.stop()
+    if not text:
+        raise ErroCarregamento("Não foi possível extrair texto da página.")
+    return text
+
+
+@st.cache_data(show_spinner=False, ttl=60 * 60)
+def carrega_site(url: str) -> str:
+    return _na_interface(extrai_site, url)
 
 
 # ---------------------------------------------------------------------
 # Loaders de Arquivos (PDF, DOCX, TXT, CSV, IMAGEM)
 # ---------------------------------------------------------------------
 
-@st.cache_data(show_spinner=False, ttl=60 * 60)
-def carrega_pdf(path: str) -> str:
+def extrai_pdf(path: str) -> str:
     _ensure_path_exists(path)
     try:
         return _docling_to_text(path)
     except Exception as e:
-        st.error(f"Erro ao carregar o PDF: {e}")
-        st.stop()
+        raise ErroCarregamento(f"Erro ao carregar o PDF: {e}") from e
 
 
-@st.cache_data(show_spinner=False, ttl=60 * 60)
-def carrega_docx(path: str) -> str:
+def extrai_docx(path: str) -> str:
     _ensure_path_exists(path)
     try:
         return _docling_to_text(path)
     except Exception as e:
-        st.error(f"Erro ao carregar o DOCX: {e}")
-        st.stop()
+        raise ErroCarregamento(f"Erro ao carregar o DOCX: {e}") from e
 
 
-@st.cache_data(show_spinner=False, ttl=60 * 60)
-def carrega_txt(path: str) -> str:
+def extrai_txt(path: str) -> str:
     _ensure_path_exists(path)
     try:
         with open(path, "r", encoding="utf-8", errors="replace") as f:
             return f.read()
     except Exception as e:
-        st.error(f"Erro ao carregar o arquivo de texto: {e}")
-        st.stop()
+        raise ErroCarregamento(f"Erro ao carregar o arquivo de texto: {e}") from e
 
 
-@st.cache_data(show_spinner=False, ttl=60 * 60)
-def carrega_csv(path: str) -> str:
+def extrai_csv(path: str) -> str:
     _ensure_path_exists(path)
     try:
         import csv  # lazy import
@@ -141,18 +157,40 @@ def carrega_csv(path: str) -> str:
         raw = open(path, 'r', encoding='utf-8', errors='replace').read()
         return f"### Tabela (preview)\n{buf.getvalue()}{extra}\n\n### CSV bruto\n```\n{raw}\n```"
     except Exception as e:
-        st.error(f"Erro ao carregar o CSV: {e}")
-        st.stop()
+        raise ErroCarregamento(f"Erro ao carregar o CSV: {e}") from e
 
 
-@st.cache_data(show_spinner=False, ttl=60 * 60)
-def carrega_imagem(path: str) -> str:
+def extrai_imagem(path: str) -> str:
     _ensure_path_exists(path)
     try:
         return _docling_to_text(path)  # Docling usa OCR quando aplicável
     except Exception as e:
-        st.error(f"Erro ao carregar a imagem: {e}")
-        st.stop()
+        raise ErroCarregamento(f"Erro ao carregar a imagem: {e}") from e
+
+
+@st.cache_data(show_spinner=False, ttl=60 * 60)
+def carrega_pdf(path: str) -> str:
+    return _na_interface(extrai_pdf, path)
+
+
+@st.cache_data(show_spinner=False, ttl=60 * 60)
+def carrega_docx(path: str) -> str:
+    return _na_interface(extrai_docx, path)
+
+
+@st.cache_data(show_spinner=False, ttl=60 * 60)
+def carrega_txt(path: str) -> str:
+    return _na_interface(extrai_txt, path)
+
+
+@st.cache_data(show_spinner=False, ttl=60 * 60)
+def carrega_csv(path: str) -> str:
+    return _na_interface(extrai_csv, path)
+
+
+@st.cache_data(show_spinner=False, ttl=60 * 60)
+def carrega_imagem(path: str) -> str:
+    return _na_interface(extrai_imagem, path)
 
 
 # ---------------------------------------------------------------------
@@ -205,20 +243,31 @@ def _try_transcript_text(video_id: str) -> Optional[str]:
 
     preferred = ("pt-BR", "pt", "en")
 
+    # TooManyRequests entra no backoff compartilhado em vez de ser apenas engolido
+    youtube = limitador("youtube", "transcript")
+
+    def _retentavel(e: BaseException) -> bool:
+        return isinstance(e, TooManyRequests) or e_retentavel(e)
+
+    def _fetch(t) -> str:
+        return "\n".join([i["text"] for i in youtube.executa(t.fetch, retentavel=_retentavel)])
+
     try:
-        transcripts = YouTubeTranscriptApi.list_transcripts(video_id)
+        transcripts = youtube.executa(
+            lambda: YouTubeTranscriptApi.list_transcripts(video_id), retentavel=_retentavel
+        )
         # 1) manuais
         for lang in preferred:
             try:
                 t = transcripts.find_manually_created_transcript([lang])
-                return "\n".join([i["text"] for i in t.fetch()])
+                return _fetch(t)
             except Exception:
                 pass
         # 2) automáticas
         for lang in preferred:
             try:
                 t = transcripts.find_generated_transcript([lang])
-                return "\n".join([i["text"] for i in t.fetch()])
+                return _fetch(t)
             except Exception:
                 pass
     except (TranscriptsDisabled, NoTranscriptFound, VideoUnavailable, TooManyRequests, CouldNotRetrieveTranscript):
@@ -227,13 +276,39 @@ def _try_transcript_text(video_id: str) -> Optional[str]:
         pass
 
     try:
-        data = YouTubeTranscriptApi.get_transcript(video_id, languages=list(preferred))
+        data = youtube.executa(
+            lambda: YouTubeTranscriptApi.get_transcript(video_id, languages=list(preferred)),
+            retentavel=_retentavel,
+        )
         return "\n".join([i["text"] for i in data])
     except Exception:
         return None
 
 
-def _transcribe_with_whisper(video_id: str) -> str:
+def _whisper(audio_path: Path, origem: str, api_key: Optional[str] = None) -> str:
+    """Transcreve um arquivo de áudio com Whisper (fila e cota compartilhadas)."""
+    try:
+        client = cliente_openai(api_key)  # sem chave: usa OPENAI_API_KEY; pool compartilhado
+    except ImportError as e:
+        raise RuntimeError(
+            "Pacote 'openai' não encontrado. Adicione 'openai>=1.3.0' ao requirements.txt"
+        ) from e
+
+    def _transcreve():
+        with audio_path.open("rb") as f:
+            return client.audio.transcriptions.create(
+                model="whisper-1",
+                language="pt",
+                response_format="text",
+                file=f,
+            )
+
+    with medir("whisper", origem=origem):
+        result = limitador("openai", "whisper").executa(_transcreve)
+    return str(result)
+
+
+def _transcribe_with_whisper(video_id: str, api_key: Optional[str] = None) -> str:
     """
     Fallback: baixa áudio com yt-dlp e transcreve com Whisper (OpenAI).
     Requer: OPENAI_API_KEY e ffmpeg no ambiente.
@@ -271,22 +346,7 @@ def _transcribe_with_whisper(video_id: str) -> str:
         if not audio_path or not audio_path.exists():
             raise RuntimeError("Falha ao obter arquivo de áudio via yt-dlp.")
 
-        try:
-            from openai import OpenAI  # lazy import
-        except Exception as e:
-            raise RuntimeError(
-                "Pacote 'openai' não encontrado. Adicione 'openai>=1.3.0' ao requirements.txt"
-            ) from e
-
-        client = OpenAI()  # usa OPENAI_API_KEY
-        with audio_path.open("rb") as f:
-            result = client.audio.transcriptions.create(
-                model="whisper-1",
-                language="pt",
-                response_format="text",
-                file=f,
-            )
-        return str(result)
+        return _whisper(audio_path, origem="youtube", api_key=api_key)
     finally:
         try:
             if audio_path and audio_path.exists():
@@ -295,20 +355,101 @@ def _transcribe_with_whisper(video_id: str) -> str:
             pass
 
 
-def carrega_youtube(url_ou_id: str) -> str:
+def extrai_youtube(
+    url_ou_id: str,
+    aviso: Optional[Callable[[str], None]] = None,
+    api_key: Optional[str] = None,
+) -> str:
     """Fluxo: transcript público > auto > fallback Whisper."""
     vid = _extract_youtube_id(url_ou_id)
     if not vid or len(vid) < 10:
-        st.error("Não foi possível identificar o ID do vídeo do YouTube.")
-        st.stop()
+        raise ErroCarregamento("Não foi possível identificar o ID do vídeo do YouTube.")
 
-    text = _try_transcript_text(vid)
+    with medir("youtube_transcript") as span:
+        text = _try_transcript_text(vid)
+        span["encontrado"] = bool(text)
     if text:
         return text
 
-    st.info("Sem legenda pública disponível. Usando fallback via Whisper…")
+    if aviso:
+        aviso("Sem legenda pública disponível. Usando fallback via Whisper…")
     try:
-        return _transcribe_with_whisper(vid)
+        return _transcribe_with_whisper(vid, api_key=api_key)
     except Exception as e:
-        st.error(f"Falha no fallback por Whisper: {e}")
-        st.stop()
+        raise ErroCarregamento(f"Falha no fallback por Whisper: {e}") from e
+
+
+def carrega_youtube(url_ou_id: str) -> str:
+    return _na_interface(extrai_youtube, url_ou_id, aviso=st.info)
+
+
+# ---------------------------------------------------------------------
+# Áudio e vídeo locais (Whisper)
+# ---------------------------------------------------------------------
+
+# Formatos aceitos diretamente pela API do Whisper, até 25 MB
+EXTENSOES_AUDIO = (".mp3", ".mp4", ".mpeg", ".mpga", ".m4a", ".wav", ".webm", ".ogg", ".flac")
+_LIMITE_WHISPER = 25 * 1024 * 1024
+
+
+def extrai_audio(path: str, api_key: Optional[str] = None) -> str:
+    """Transcreve uma gravação local (áudio ou vídeo em formato aceito pelo Whisper)."""
+    _ensure_path_exists(path)
+    tamanho = os.path.getsize(path)
+    if tamanho < 1024:
+        raise ErroCarregamento("O arquivo de áudio parece estar corrompido ou vazio.")
+    if tamanho > _LIMITE_WHISPER:
+        raise ErroCarregamento(f"Arquivo com {tamanho / 1024 / 1024:.0f} MB; o Whisper aceita até 25 MB.")
+    try:
+        return _whisper(Path(path), origem="audio", api_key=api_key)
+    except Exception as e:
+        raise ErroCarregamento(f"Falha na transcrição por Whisper: {e}") from e
+
+
+# ---------------------------------------------------------------------
+# Despacho por tipo (fora da interface)
+# ---------------------------------------------------------------------
+
+TIPOS_POR_EXTENSAO = {
+    ".pdf": "Analisador de Pdf",
+    ".docx": "Analisador de DOCX",
+    ".csv": "Analisador de CSV",
+    ".txt": "Analisador de Texto",
+    ".png": "Analisador de Imagem",
+    ".jpg": "Analisador de Imagem",
+    ".jpeg": "Analisador de Imagem",
+    **{ext: "Transcrição de Áudio" for ext in EXTENSOES_AUDIO},
+}
+
+EXTRATORES = {
+    "Analisador de Site": extrai_site,
+    "Analisador de Youtube": extrai_youtube,
+    "Analisador de Pdf": extrai_pdf,
+    "Analisador de DOCX": extrai_docx,
+    "Analisador de CSV": extrai_csv,
+    "Analisador de Texto": extrai_txt,
+    "Analisador de Imagem": extrai_imagem,
+    "Transcrição de Áudio": extrai_audio,
+}
+
+
+def tipo_da_entrada(entrada: str) -> Optional[str]:
+    """Tipo de documento de um caminho ou URL (mesmos nomes usados na interface)."""
+    if re.match(r"^https?://", entrada or ""):
+        host = (urlparse(entrada).hostname or "").lower()
+        return "Analisador de Youtube" if host.endswith(("youtube.com", "youtu.be")) else "Analisador de Site"
+    return TIPOS_POR_EXTENSAO.get(os.path.splitext(entrada or "")[1].lower())
+
+
+# Extratores que chamam a OpenAI (Whisper) e aceitam a chave explicitamente
+_USAM_OPENAI = ("Analisador de Youtube", "Transcrição de Áudio")
+
+
+def extrai_documento(entrada: str, tipo: Optional[str] = None, api_key: Optional[str] = None) -> str:
+    """Extrai o texto de um caminho ou URL, sem Streamlit. Levanta ErroCarregamento."""
+    tipo = tipo or tipo_da_entrada(entrada)
+    if tipo not in EXTRATORES:
+        raise ErroCarregamento(f"Tipo de arquivo não suportado: {os.path.splitext(entrada)[1] or entrada}")
+    if tipo in _USAM_OPENAI:
+        return EXTRATORES[tipo](entrada, api_key=api_key)
+    return EXTRATORES[tipo](entrada)
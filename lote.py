@@ -0,0 +1,384 @@
+# lote.py
+# Modo em lote, sem Streamlit: resume documentos ou transcreve gravações de pastas
+# inteiras reaproveitando os loaders (extrai_*), a normalização e o chat da Home.
+#
+# Uso:
+#   python lote.py resumir relatorios/ --saida resumos.jsonl --workers 8
+#   python lote.py resumir --lista urls.txt --pergunta "Liste os riscos citados" --roteamento
+#   python lote.py transcrever gravacoes/ --saida transcricoes.jsonl --workers 4
+#
+# A saída JSONL é também o checkpoint: rodar de novo com o mesmo --saida pula as
+# entradas que já terminaram com sucesso e tenta de novo as que deram erro.
+# Os workers dividem a mesma fila/cota por provedor (limitador.py), então aumentar
+# --workers acelera o parsing local sem estourar os limites das APIs.
+#
+# Como API:
+#   from lote import Lote, coleta_entradas, transcritor
+#   Lote(transcritor(), "transcricoes.jsonl", workers=4).executa(coleta_entradas(["gravacoes/"]))
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from metricas import COLETOR, define_sessao, incrementa, medir, mede_stream
+
+PERGUNTA_RESUMO = (
+    "Faça um resumo estruturado deste documento: tema central, pontos principais, "
+    "dados relevantes e uma conclusão."
+)
+
+
+class ErroLote(RuntimeError):
+    """Configuração inválida do lote (ex.: chave de API ausente)."""
+
+
+# ---------------------------------------------------------------------
+# Entradas
+# ---------------------------------------------------------------------
+
+def _e_url(entrada: str) -> bool:
+    return entrada.startswith(("http://", "https://"))
+
+
+def coleta_entradas(
+    origens: Iterable[str],
+    extensoes: Optional[Iterable[str]] = None,
+    recursivo: bool = True,
+) -> List[str]:
+    """
+    Expande pastas em arquivos suportados (pelas extensões dos loaders) e mantém
+    arquivos e URLs como estão. A ordem é estável, para a retomada ser previsível.
+    """
+    from loaders import TIPOS_POR_EXTENSAO  # lazy import
+
+    aceitas = {e.lower() for e in (extensoes or TIPOS_POR_EXTENSAO)}
+    entradas: List[str] = []
+    for origem in origens:
+        origem = origem.strip()
+        if not origem:
+            continue
+        if _e_url(origem):
+            entradas.append(origem)
+            continue
+        caminho = Path(origem)
+        if caminho.is_dir():
+            arquivos = caminho.rglob("*") if recursivo else caminho.glob("*")
+            entradas += sorted(
+                str(a.resolve()) for a in arquivos if a.is_file() and a.suffix.lower() in aceitas
+            )
+        else:
+            entradas.append(str(caminho.resolve()))
+    return list(dict.fromkeys(entradas))
+
+
+def le_lista(caminho: str) -> List[str]:
+    """Uma entrada (caminho ou URL) por linha; linhas vazias e com # são ignoradas."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        return [l.strip() for l in f if l.strip() and not l.lstrip().startswith("#")]
+
+
+# ---------------------------------------------------------------------
+# Tarefas
+# ---------------------------------------------------------------------
+
+def resumidor(
+    provedor: str = "OpenAI",
+    modelo: str = "gpt-5-mini",
+    pergunta: str = PERGUNTA_RESUMO,
+    roteamento: bool = False,
+    normalizar: bool = True,
+) -> Callable[[str], dict]:
+    """
+    Tarefa que extrai o documento e pergunta ao modelo (por padrão, um resumo).
+    Com `roteamento`, o modelo é escolhido pelo tamanho do prompt, como na Home.
+    """
+    from assistente import VARIAVEIS_CHAVE, chave_api, cria_chat, monta_template, system_message  # lazy import
+    from documentos import RegistroDocumentos, estima_tokens, monta_contexto
+    from limitador import limitador
+    from loaders import extrai_documento, tipo_da_entrada
+    from normalizacao import normalizador_com_metricas
+    from roteamento import CATALOGO, Roteador, estima_tokens_prompt
+
+    roteador = None
+    if roteamento:
+        chaves = {p: chave_api(p) for p in VARIAVEIS_CHAVE}
+        fabricas = {
+            p: (lambda m, p=p, k=k: cria_chat(p, m, k))
+            for p, k in chaves.items() if k
+        }
+        if not fabricas:
+            raise ErroLote("Nenhuma chave de API encontrada (OPENAI_API_KEY / GROQ_API_KEY).")
+        roteador = Roteador(CATALOGO, fabricas)
+    else:
+        api_key = chave_api(provedor)
+        if not api_key:
+            raise ErroLote(f"Chave de API do {provedor} não encontrada ({VARIAVEIS_CHAVE[provedor]}).")
+    # Áudio e o fallback do YouTube usam o Whisper, independentemente do provedor do chat
+    chave_openai = chave_api("OpenAI")
+
+    def _resume(entrada: str) -> dict:
+        tipo = tipo_da_entrada(entrada)
+
+        def _carrega():
+            with medir("loader", tipo=tipo, origem="lote") as span:
+                texto = extrai_documento(entrada, tipo, api_key=chave_openai)
+                span["tokens_documento"] = estima_tokens(texto)
+                return texto
+
+        # Registro próprio por entrada: mesmo cabeçalho de documento e contagem de tokens da Home
+        doc = RegistroDocumentos().adiciona(
+            tipo, Path(entrada).name if not _e_url(entrada) else entrada, entrada,
+            _carrega, normalizador_com_metricas(tipo) if normalizar else None,
+        )
+        mensagem_sistema = system_message(tipo, monta_contexto([doc]))
+        template = monta_template(mensagem_sistema)
+        tokens_prompt = estima_tokens_prompt([mensagem_sistema, pergunta])
+        incrementa("tokens", tokens_prompt, tipo="prompt")
+        entradas = {"input": pergunta, "chat_history": []}
+
+        if roteador is not None:
+            escolha: dict = {}
+            pedacos = roteador.stream(template, entradas, tokens_prompt, escolha)
+            nome_modelo = "roteamento"
+        else:
+            chain = template | cria_chat(provedor, modelo, api_key)
+            pedacos = limitador(provedor, "chat").stream(lambda: chain.stream(entradas))
+            nome_modelo = f"{provedor}/{modelo}"
+
+        partes = [getattr(p, "content", p) for p in mede_stream(pedacos, modelo=nome_modelo)]
+        if roteador is not None and escolha:
+            nome_modelo = f"{escolha['perfil'].provedor}/{escolha['perfil'].modelo}"
+        return {
+            "tipo": tipo,
+            "modelo": nome_modelo,
+            "tokens_documento": doc.tokens,
+            "tokens_economizados": doc.tokens_economizados,
+            "tokens_prompt": tokens_prompt,
+            "resposta": "".join(p for p in partes if isinstance(p, str)),
+        }
+
+    return _resume
+
+
+def transcritor(api_key: Optional[str] = None) -> Callable[[str], dict]:
+    """Tarefa que transcreve gravações locais (Whisper) e vídeos do YouTube."""
+    from assistente import chave_api  # lazy import
+    from documentos import estima_tokens
+    from loaders import ErroCarregamento, extrai_audio, extrai_youtube, tipo_da_entrada
+
+    api_key = api_key or chave_api("OpenAI")
+
+    def _transcreve(entrada: str) -> dict:
+        tipo = tipo_da_entrada(entrada)
+        with medir("loader", tipo=tipo, origem="lote") as span:
+            if tipo == "Transcrição de Áudio":
+                texto = extrai_audio(entrada, api_key=api_key)
+            elif tipo == "Analisador de Youtube":
+                texto = extrai_youtube(entrada, api_key=api_key)
+            else:
+                raise ErroCarregamento("Entrada não é uma gravação nem um vídeo do YouTube.")
+            span["tokens_documento"] = estima_tokens(texto)
+        return {"tipo": tipo, "tokens": estima_tokens(texto), "texto": texto}
+
+    return _transcreve
+
+
+# ---------------------------------------------------------------------
+# Execução com checkpoint
+# ---------------------------------------------------------------------
+
+@dataclass
+class ResumoLote:
+    total: int
+    pulados: int
+    concluidos: int
+    erros: int
+    duracao_s: float
+
+
+class Lote:
+    """
+    Executa `tarefa(entrada) -> dict` em `workers` threads e grava uma linha JSONL
+    por entrada assim que ela termina. O próprio arquivo de saída é o checkpoint.
+    """
+
+    def __init__(
+        self,
+        tarefa: Callable[[str], dict],
+        saida: str,
+        workers: int = 4,
+        repetir_erros: bool = True,
+        progresso: Optional[Callable[[int, int, dict], None]] = None,
+    ) -> None:
+        self.tarefa = tarefa
+        self.saida = saida
+        self.workers = max(1, workers)
+        self.repetir_erros = repetir_erros
+        self.progresso = progresso
+        self.id_lote = f"lote-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+
+    def ja_processadas(self) -> Set[str]:
+        """Entradas presentes na saída (só as com sucesso, se `repetir_erros`)."""
+        feitas: Set[str] = set()
+        if not os.path.exists(self.saida):
+            return feitas
+        # Em binário: a última linha pode ter sido cortada no meio de um caractere UTF-8
+        with open(self.saida, "rb") as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha.decode("utf-8"))
+                except ValueError:  # inclui UnicodeDecodeError
+                    continue  # última linha truncada por uma interrupção
+                if registro.get("status") == "ok" or not self.repetir_erros:
+                    feitas.add(registro.get("entrada"))
+        return feitas
+
+    def _processa(self, entrada: str) -> dict:
+        define_sessao(self.id_lote)
+        inicio = time.perf_counter()
+        registro: Dict[str, object] = {"entrada": entrada}
+        with medir("lote_item") as span:
+            try:
+                registro.update(self.tarefa(entrada))
+                registro["status"] = "ok"
+            except Exception as e:
+                registro.update(status="erro", erro=f"{type(e).__name__}: {e}")
+            span["status"] = registro["status"]
+        registro["duracao_s"] = round(time.perf_counter() - inicio, 3)
+        registro["lote"] = self.id_lote
+        return registro
+
+    def _grava(self, arquivo, registro: dict) -> None:
+        with self._lock:
+            arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            arquivo.flush()
+
+    def executa(self, entradas: Iterable[str]) -> ResumoLote:
+        inicio = time.perf_counter()
+        entradas = list(dict.fromkeys(entradas))
+        feitas = self.ja_processadas()
+        pendentes = [e for e in entradas if e not in feitas]
+        concluidos = erros = 0
+
+        pasta = os.path.dirname(os.path.abspath(self.saida))
+        os.makedirs(pasta, exist_ok=True)
+        # Se a execução anterior parou no meio de uma linha, começa na próxima
+        # (verificado em bytes: o corte pode cair dentro de um caractere multibyte)
+        if os.path.exists(self.saida) and os.path.getsize(self.saida) > 0:
+            with open(self.saida, "rb+") as bruto:
+                bruto.seek(-1, os.SEEK_END)
+                if bruto.read(1) != b"\n":
+                    bruto.write(b"\n")
+
+        with open(self.saida, "a", encoding="utf-8") as arquivo:
+
+            executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="lote")
+            try:
+                futuros = [executor.submit(self._processa, e) for e in pendentes]
+                for futuro in as_completed(futuros):
+                    registro = futuro.result()
+                    self._grava(arquivo, registro)
+                    if registro["status"] == "ok":
+                        concluidos += 1
+                    else:
+                        erros += 1
+                    incrementa("lote_itens", status=registro["status"])
+                    if self.progresso:
+                        self.progresso(concluidos + erros, len(pendentes), registro)
+            finally:
+                # Em Ctrl+C, descarta o que não começou; o que terminou já está no arquivo
+                executor.shutdown(wait=True, cancel_futures=True)
+                COLETOR.persiste()
+
+        return ResumoLote(
+            total=len(entradas),
+            pulados=len(entradas) - len(pendentes),
+            concluidos=concluidos,
+            erros=erros,
+            duracao_s=round(time.perf_counter() - inicio, 3),
+        )
+
+
+# ---------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------
+
+def _mostra_progresso(feitos: int, total: int, registro: dict) -> None:
+    marca = "ok  " if registro["status"] == "ok" else "ERRO"
+    detalhe = f" — {registro['erro']}" if registro["status"] != "ok" else ""
+    print(f"[{feitos}/{total}] {marca} {registro['entrada']} ({registro['duracao_s']:.1f}s){detalhe}",
+          file=sys.stderr, flush=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Processamento em lote do autoMazze (sem interface)")
+    sub = parser.add_subparsers(dest="modo", required=True)
+
+    comum = argparse.ArgumentParser(add_help=False)
+    comum.add_argument("origens", nargs="*", help="pastas, arquivos ou URLs")
+    comum.add_argument("--lista", help="arquivo com uma entrada (caminho ou URL) por linha")
+    comum.add_argument("--saida", help="arquivo JSONL de resultados (também é o checkpoint)")
+    comum.add_argument("--workers", type=int, default=4)
+    comum.add_argument("--sem-recursao", action="store_true", help="não entra em subpastas")
+    comum.add_argument("--sem-repetir-erros", action="store_true",
+                       help="na retomada, pula também as entradas que deram erro")
+
+    resumir = sub.add_parser("resumir", parents=[comum], help="resume (ou pergunta sobre) cada documento")
+    resumir.add_argument("--provedor", default="OpenAI", choices=["OpenAI", "Groq"])
+    resumir.add_argument("--modelo", default="gpt-5-mini")
+    resumir.add_argument("--pergunta", default=PERGUNTA_RESUMO)
+    resumir.add_argument("--roteamento", action="store_true",
+                         help="escolhe o modelo pelo tamanho do documento, com failover entre provedores")
+    resumir.add_argument("--sem-normalizacao", action="store_true")
+
+    sub.add_parser("transcrever", parents=[comum], help="transcreve gravações e vídeos do YouTube")
+
+    args = parser.parse_args(argv)
+
+    # Fora do `streamlit run`, cada st.cache_data avisaria "No runtime found" ao importar
+    from streamlit import logger as logger_streamlit  # lazy import
+    logger_streamlit.set_log_level("error")
+
+    origens = list(args.origens) + (le_lista(args.lista) if args.lista else [])
+    if not origens:
+        parser.error("informe pastas/arquivos/URLs ou --lista")
+
+    try:
+        if args.modo == "resumir":
+            tarefa = resumidor(args.provedor, args.modelo, args.pergunta,
+                               args.roteamento, not args.sem_normalizacao)
+            extensoes = None
+        else:
+            from loaders import EXTENSOES_AUDIO  # lazy import
+            tarefa = transcritor()
+            extensoes = EXTENSOES_AUDIO
+    except ErroLote as e:
+        print(f"erro: {e}", file=sys.stderr)
+        return 2
+
+    entradas = coleta_entradas(origens, extensoes, recursivo=not args.sem_recursao)
+    saida = args.saida or f"{args.modo}.jsonl"
+    lote = Lote(tarefa, saida, args.workers, not args.sem_repetir_erros, _mostra_progresso)
+    print(f"{len(entradas)} entradas, {args.workers} workers → {saida}", file=sys.stderr)
+    try:
+        resumo = lote.executa(entradas)
+    except KeyboardInterrupt:
+        print("interrompido; rode o mesmo comando para retomar", file=sys.stderr)
+        return 130
+
+    print(f"concluídos: {resumo.concluidos}  erros: {resumo.erros}  já feitos: {resumo.pulados}  "
+          f"tempo: {resumo.duracao_s:.1f}s", file=sys.stderr)
+    return 1 if resumo.erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# metricas.py
+# Instrumentação por etapa (spans com duração e atributos) e contadores, com
+# exportação em JSONL e no formato texto do Prometheus.
+#
+# Se AUTOMAZZE_METRICAS_DIR estiver definido, persiste() acrescenta os spans em
+# metricas.jsonl e reescreve metricas.prom (para o textfile collector do node_exporter).
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from documentos import estima_tokens
+
+
+_SESSAO: ContextVar[Optional[str]] = ContextVar("automazze_sessao", default=None)
+
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def define_sessao(sessao_id: Optional[str]) -> None:
+    """Marca os spans seguintes (nesta thread) com o id da sessão."""
+    _SESSAO.set(sessao_id)
+
+
+def _rotulos(rotulos: Dict[str, object]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+
+def _formata(valor: float) -> str:
+    # Sem notação científica truncada (ex.: 1.23457e+06): contadores de tokens passam de 1e6
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+class Coletor:
+    def __init__(self, max_spans: int = 5000) -> None:
+        self._spans: deque = deque(maxlen=max_spans)
+        self._pendentes: deque = deque(maxlen=max_spans)
+        self._contadores: Dict[Tuple[str, Tuple], float] = {}
+        self._histogramas: Dict[str, List[float]] = {}  # etapa -> [contagem por bucket..., soma, total]
+        self._lock = threading.Lock()
+
+    # -- registro ------------------------------------------------------
+
+    def registra(self, etapa: str, duracao: float, **atributos) -> None:
+        span = {
+            "etapa": etapa,
+            "inicio": round(time.time() - duracao, 3),
+            "duracao_s": round(duracao, 4),
+            "sessao": _SESSAO.get(),
+            **atributos,
+        }
+        with self._lock:
+            self._spans.append(span)
+            self._pendentes.append(span)
+            h = self._histogramas.setdefault(etapa, [0.0] * (len(BUCKETS) + 2))
+            for i, limite in enumerate(BUCKETS):
+                if duracao <= limite:
+                    h[i] += 1
+            h[-2] += duracao
+            h[-1] += 1
+
+    @contextmanager
+    def medir(self, etapa: str, **atributos) -> Iterator[dict]:
+        """Mede o bloco; o dict devolvido aceita atributos extras (ex.: tokens)."""
+        inicio = time.perf_counter()
+        try:
+            yield atributos
+        except BaseException as e:
+            atributos.setdefault("erro", type(e).__name__)
+            raise
+        finally:
+            self.registra(etapa, time.perf_counter() - inicio, **atributos)
+
+    def incrementa(self, nome: str, valor: float = 1, **rotulos) -> None:
+        chave = (nome, _rotulos(rotulos))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def mede_stream(self, pedacos: Iterable, etapa: str = "llm", **atributos) -> Iterator:
+        """
+        Repassa os pedaços de um stream registrando o tempo até o primeiro token
+        (`<etapa>_primeiro_token`), o tempo total (`<etapa>_stream`) e os tokens gerados.
+        """
+        inicio = time.perf_counter()
+        primeiro = None
+        texto: List[str] = []
+        erro = None
+        try:
+            for pedaco in pedacos:
+                if primeiro is None:
+                    primeiro = time.perf_counter() - inicio
+                    self.registra(f"{etapa}_primeiro_token", primeiro, **atributos)
+                texto.append(getattr(pedaco, "content", pedaco) if not isinstance(pedaco, str) else pedaco)
+                yield pedaco
+        except BaseException as e:
+            erro = type(e).__name__
+            raise
+        finally:
+            tokens = estima_tokens("".join(t for t in texto if isinstance(t, str)))
+            extras = {"tokens_completion": tokens}
+            if erro:
+                extras["erro"] = erro
+            self.registra(f"{etapa}_stream", time.perf_counter() - inicio, **atributos, **extras)
+            self.incrementa("tokens", tokens, tipo="completion")
+
+    # -- consulta e exportação -----------------------------------------
+
+    def spans(self, sessao: Optional[str] = None, limite: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            spans = [s for s in self._spans if sessao is None or s.get("sessao") == sessao]
+        return spans[-limite:] if limite else spans
+
+    def exporta_jsonl(self, sessao: Optional[str] = None) -> str:
+        return "".join(json.dumps(s, ensure_ascii=False) + "\n" for s in self.spans(sessao))
+
+    def exporta_prometheus(self) -> str:
+        linhas: List[str] = []
+        with self._lock:
+            histogramas = {k: list(v) for k, v in self._histogramas.items()}
+            contadores = dict(self._contadores)
+
+        linhas.append("# HELP automazze_etapa_segundos Duração de cada etapa do pipeline.")
+        linhas.append("# TYPE automazze_etapa_segundos histogram")
+        for etapa, h in sorted(histogramas.items()):
+            for i, limite in enumerate(BUCKETS):
+                linhas.append(f'automazze_etapa_segundos_bucket{{etapa="{etapa}",le="{limite}"}} {int(h[i])}')
+            linhas.append(f'automazze_etapa_segundos_bucket{{etapa="{etapa}",le="+Inf"}} {int(h[-1])}')
+            linhas.append(f'automazze_etapa_segundos_sum{{etapa="{etapa}"}} {h[-2]:.6f}')
+            linhas.append(f'automazze_etapa_segundos_count{{etapa="{etapa}"}} {int(h[-1])}')
+
+        nomes = sorted({nome for nome, _ in contadores})
+        for nome in nomes:
+            linhas.append(f"# TYPE automazze_{nome}_total counter")
+            for (n, rotulos), valor in sorted(contadores.items()):
+                if n != nome:
+                    continue
+                texto = ",".join(f'{k}="{v}"' for k, v in rotulos)
+                valor = _formata(valor)
+                linhas.append(f"automazze_{nome}_total{{{texto}}} {valor}" if texto else f"automazze_{nome}_total {valor}")
+        return "\n".join(linhas) + "\n"
+
+    def persiste(self, pasta: Optional[str] = None) -> None:
+        """Grava os spans novos em JSONL e o snapshot Prometheus (se houver pasta configurada)."""
+        pasta = pasta or os.environ.get("AUTOMAZZE_METRICAS_DIR")
+        if not pasta:
+            return
+        os.makedirs(pasta, exist_ok=True)
+        with self._lock:
+            pendentes = list(self._pendentes)
+            self._pendentes.clear()
+        with open(os.path.join(pasta, "metricas.jsonl"), "a", encoding="utf-8") as f:
+            for s in pendentes:
+                f.write(json.dumps(s, ensure_ascii=False) + "\n")
+        # Nome único por thread: várias sessões podem persistir ao mesmo tempo
+        temporario = os.path.join(pasta, f"metricas.prom.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(self.exporta_prometheus())
+        os.replace(temporario, os.path.join(pasta, "metricas.prom"))
+
+
+COLETOR = Coletor()
+medir = COLETOR.medir
+registra = COLETOR.registra
+incrementa = COLETOR.incrementa
+mede_stream = COLETOR.mede_stream
@@ -0,0 +1,232 @@
+# normalizacao.py
+# Normalização entre os loaders e o prompt: junta legendas automáticas em frases,
+# remove linhas repetidas (exatas e quase iguais, via hash/SimHash) e descarta
+# boilerplate de sites (menus, rodapés, avisos de cookies), contando os tokens poupados.
+
+import hashlib
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from documentos import estima_tokens
+from metricas import incrementa, medir
+
+
+# ---------------------------------------------------------------------
+# Resultado
+# ---------------------------------------------------------------------
+
+@dataclass
+class Normalizacao:
+    texto: str
+    tokens_antes: int
+    tokens_depois: int
+    linhas_removidas: int = 0
+
+    @property
+    def tokens_economizados(self) -> int:
+        return max(0, self.tokens_antes - self.tokens_depois)
+
+
+# ---------------------------------------------------------------------
+# Duplicadas (exatas e quase iguais)
+# ---------------------------------------------------------------------
+
+_BITS = 64
+_BANDAS = 4  # distância de Hamming <= 3 garante ao menos uma banda de 16 bits idêntica
+
+
+def _chave_exata(linha: str) -> bytes:
+    # Só caixa, acentos e espaços: pontuação distingue "10,50" de "1050"
+    texto = re.sub(r"\s+", " ", _sem_acentos(linha.lower())).strip()
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=12).digest()
+
+
+def _sem_acentos(texto: str) -> str:
+    texto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def _simhash(palavras: List[str]) -> int:
+    # Palavras + pares de palavras: poucas features por linha, então sem shingles longos
+    pesos = [0] * _BITS
+    shingles = palavras + [f"{a} {b}" for a, b in zip(palavras, palavras[1:])]
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for i in range(_BITS):
+            pesos[i] += 1 if (h >> i) & 1 else -1
+    return sum(1 << i for i, p in enumerate(pesos) if p > 0)
+
+
+def _bandas(h: int) -> List[Tuple[int, int]]:
+    largura = _BITS // _BANDAS
+    return [(b, (h >> (b * largura)) & ((1 << largura) - 1)) for b in range(_BANDAS)]
+
+
+def remove_duplicadas(
+    linhas: List[str],
+    distancia_max: int = 3,
+    min_palavras_aproximada: int = 6,
+) -> Tuple[List[str], int]:
+    """
+    Mantém a primeira ocorrência de cada linha. Linhas iguais (ignorando caixa,
+    acentos e espaços) saem sempre; linhas longas também saem quando o SimHash fica
+    a até `distancia_max` bits de uma linha já vista com os mesmos números.
+    Linhas de tabela Markdown ("|") nunca são removidas.
+    """
+    vistas = set()
+    indice: Dict[Tuple[int, int], List[Tuple[int, Tuple[str, ...]]]] = {}
+    saida: List[str] = []
+    removidas = 0
+    for linha in linhas:
+        if linha.lstrip().startswith("|"):
+            saida.append(linha)
+            continue
+        chave = _chave_exata(linha)
+        if chave in vistas:
+            removidas += 1
+            continue
+        palavras = re.findall(r"\w+", _sem_acentos(linha.lower()))
+        if len(palavras) >= min_palavras_aproximada:
+            h = _simhash(palavras)
+            numeros = tuple(re.findall(r"\d[\d.,]*", linha))
+            bandas = _bandas(h)
+            candidatos = {c for banda in bandas for c in indice.get(banda, ())}
+            if any(n == numeros and bin(h ^ c).count("1") <= distancia_max for c, n in candidatos):
+                removidas += 1
+                continue
+            for banda in bandas:
+                indice.setdefault(banda, []).append((h, numeros))
+        vistas.add(chave)
+        saida.append(linha)
+    return saida, removidas
+
+
+# ---------------------------------------------------------------------
+# Legendas (YouTube)
+# ---------------------------------------------------------------------
+
+_MARCAS_LEGENDA = re.compile(
+    r"\[(?:música|musica|music|aplausos|applause|risos|laughter|inaudível|inaudivel|__)\]", re.I
+)
+_FIM_DE_FRASE = re.compile(r"[.!?…][\"')\]]?$")
+
+
+def _sobreposicao(anteriores: List[str], novas: List[str], maximo: int = 12) -> int:
+    """Palavras do início de `novas` que repetem o final de `anteriores` (legenda rolante)."""
+    limite = min(len(anteriores), len(novas), maximo)
+    for k in range(limite, 0, -1):
+        if [p.lower() for p in anteriores[-k:]] == [p.lower() for p in novas[:k]]:
+            return k
+    return 0
+
+
+def junta_legendas(texto: str, max_palavras: int = 40) -> str:
+    """Junta os fragmentos de uma linha por cue em frases (ou blocos de até `max_palavras`)."""
+    frases: List[str] = []
+    atual: List[str] = []
+    for linha in texto.splitlines():
+        palavras = _MARCAS_LEGENDA.sub(" ", linha).split()
+        if not palavras:
+            continue
+        # Depois de fechar uma frase, a próxima cue ainda pode repetir o final dela
+        anteriores = atual or (frases[-1].split() if frases else [])
+        palavras = palavras[_sobreposicao(anteriores, palavras):]
+        if not palavras:
+            continue
+        atual += palavras
+        if atual and (_FIM_DE_FRASE.search(atual[-1]) or len(atual) >= max_palavras):
+            frases.append(" ".join(atual))
+            atual = []
+    if atual:
+        frases.append(" ".join(atual))
+    return "\n".join(frases)
+
+
+def normaliza_transcricao(texto: str) -> Normalizacao:
+    antes = estima_tokens(texto)
+    frases, removidas = remove_duplicadas(junta_legendas(texto).splitlines())
+    resultado = "\n".join(frases)
+    return Normalizacao(resultado, antes, estima_tokens(resultado), removidas)
+
+
+# ---------------------------------------------------------------------
+# Páginas (sites)
+# ---------------------------------------------------------------------
+
+# Avisos de cookies (banners costumam ter uma ou duas frases)
+_COOKIES = re.compile(
+    r"(aceit\w* (?:todos os |os )?cookies|usamos cookies|utilizamos cookies|we use cookies|accept (?:all )?cookies)",
+    re.I,
+)
+# Rodapés e atalhos: só em linhas curtas, para não apagar um texto *sobre* LGPD ou termos de uso
+_RODAPE = re.compile(
+    r"(todos os direitos reservados|all rights reserved|pol[ií]tica de privacidade|privacy policy"
+    r"|termos de uso|terms of (?:use|service)|pular para o conte[uú]do|skip to (?:main )?content"
+    r"|inscreva-se na newsletter|subscribe to our newsletter|compartilhe:?$|share this)",
+    re.I,
+)
+_MAX_PALAVRAS_COOKIES = 40
+_MAX_PALAVRAS_RODAPE = 8
+
+
+def _e_boilerplate(linha: str) -> bool:
+    palavras = len(linha.split())
+    if palavras <= _MAX_PALAVRAS_COOKIES and _COOKIES.search(linha):
+        return True
+    if palavras <= _MAX_PALAVRAS_RODAPE and _RODAPE.search(linha):
+        return True
+    # Menus: vários itens curtos separados por | • · (tabelas Markdown começam com "|")
+    if linha.startswith("|"):
+        return False
+    itens = [i.strip() for i in re.split(r"\s[|•·»]\s", linha)]
+    return len(itens) >= 3 and all(0 < len(i.split()) <= 4 for i in itens)
+
+
+def normaliza_pagina(texto: str) -> Normalizacao:
+    antes = estima_tokens(texto)
+    linhas = [re.sub(r"[ \t\u00a0]+", " ", l).strip() for l in texto.splitlines()]
+    uteis = [l for l in linhas if l and not _e_boilerplate(l)]
+    descartadas = sum(1 for l in linhas if l) - len(uteis)
+    uteis, removidas = remove_duplicadas(uteis)
+    resultado = "\n".join(uteis)
+    return Normalizacao(resultado, antes, estima_tokens(resultado), descartadas + removidas)
+
+
+# ---------------------------------------------------------------------
+# Entrada principal
+# ---------------------------------------------------------------------
+
+NORMALIZADORES: Dict[str, Callable[[str], Normalizacao]] = {
+    'Analisador de Youtube': normaliza_transcricao,
+    'Analisador de Site': normaliza_pagina,
+}
+
+
+def normaliza_documento(texto: str, tipo: str) -> Optional[Normalizacao]:
+    """Normaliza conforme o tipo do documento; None quando o tipo não tem normalização."""
+    normalizador = NORMALIZADORES.get(tipo)
+    if normalizador is None or not texto:
+        return None
+    return normalizador(texto)
+
+
+def normalizador_com_metricas(tipo: str) -> Optional[Callable[[str], str]]:
+    """
+    Normalizador para RegistroDocumentos.adiciona, com span 'normalizacao' e o
+    contador tokens_economizados (None para tipos sem normalização).
+    """
+    if tipo not in NORMALIZADORES:
+        return None
+
+    def _normaliza(texto: str) -> str:
+        with medir("normalizacao", tipo=tipo) as span:
+            resultado = normaliza_documento(texto, tipo)
+            if resultado is None:
+                return texto
+            span.update(tokens_antes=resultado.tokens_antes, tokens_depois=resultado.tokens_depois,
+                        linhas_removidas=resultado.linhas_removidas)
+        incrementa("tokens_economizados", resultado.tokens_economizados, tipo=tipo)
+        return resultado.texto
+    return _normaliza
@@ -2,11 +2,10 @@ from pathlib import Path
 import queue
 import time
 import streamlit as st
-from streamlit_webrtc import WebRtcMode, webrtc_streamer
-from openai import OpenAI
-import pydub
 import os
-from moviepy import *
+from limitador import limitador
+from clientes import cliente_openai
+from metricas import COLETOR, define_sessao, medir
 
 
 st.set_page_config(
@@ -26,7 +25,10 @@ api_key = st.secrets["OPENAI_API_KEY"]
 if not api_key:
     st.error("OpenAI API key not found. Please set the OPENAI_API_KEY environment variable.")
     st.stop()
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+
+def cliente():
+    # O SDK da OpenAI só é importado na primeira transcrição
+    return cliente_openai(api_key)
 
 def transcreve_audio(caminho_audio, prompt):
     # Verifica se o arquivo tem um tamanho razoável
@@ -34,16 +36,18 @@ def transcreve_audio(caminho_audio, prompt):
     if os.path.getsize(caminho_audio) < tamanho_minimo:
         raise ValueError("O arquivo de áudio parece estar corrompido ou vazio.")
     
-    # Envia para a API da OpenAI
-    with open(caminho_audio, 'rb') as arquivo_audio:
-        transcricao = client.audio.transcriptions.create(
-            model='whisper-1',
-            language='pt',
-            response_format='text',
-            file=arquivo_audio,
-            prompt=prompt,
-        )
-        return transcricao
+    # Envia para a API da OpenAI (fila e cota compartilhadas do Whisper)
+    def _transcreve():
+        with open(caminho_audio, 'rb') as arquivo_audio:
+            return cliente().audio.transcriptions.create(
+                model='whisper-1',
+                language='pt',
+                response_format='text',
+                file=arquivo_audio,
+                prompt=prompt,
+            )
+    with medir('whisper', origem='transcript'):
+        return limitador('openai', 'whisper').executa(_transcreve)
 
 
 if not 'transcricao_mic' in st.session_state:
@@ -55,6 +59,7 @@ def get_ice_servers():
 
 
 def adiciona_chunck_de_audio(frames_de_audio, chunck_audio):
+    import pydub  # lazy import
     for frame in frames_de_audio:
         sound = pydub.AudioSegment(
             data=frame.to_ndarray().tobytes(),
@@ -67,6 +72,12 @@ def adiciona_chunck_de_audio(frames_de_audio, chunck_audio):
 
 def transcreve_tab_mic():
     prompt_mic = st.text_input('(opcional) Digite o seu prompt', key='input_mic')
+    # O componente WebRTC (e o streamlit_webrtc) só é carregado quando o usuário liga o microfone
+    if not st.toggle('🎙️ Ativar microfone', key='mic_ativo'):
+        st.write(st.session_state['transcricao_mic'])
+        return
+
+    from streamlit_webrtc import WebRtcMode, webrtc_streamer  # lazy import
     webrtx_ctx = webrtc_streamer(
         key='recebe_audio',
         mode=WebRtcMode.SENDONLY,
@@ -78,6 +89,7 @@ def transcreve_tab_mic():
         st.write(st.session_state['transcricao_mic'])
         return
     
+    import pydub  # lazy import
     container = st.empty()
     container.markdown('Comece a falar...')
     chunck_audio = pydub.AudioSegment.empty()
@@ -106,6 +118,7 @@ def transcreve_tab_mic():
 
 # TRANSCREVE VIDEO =====================================
 def _salva_audio_do_video(video_bytes):
+    from moviepy import VideoFileClip  # lazy import
     with open(ARQUIVO_VIDEO_TEMP, mode='wb') as video_f:
         video_f.write(video_bytes.read())
     moviepy_video = VideoFileClip(str(ARQUIVO_VIDEO_TEMP))
@@ -124,14 +137,18 @@ def transcreve_tab_audio():
     prompt_input = st.text_input('(opcional) Digite o seu prompt', key='input_audio')
     arquivo_audio = st.file_uploader('Adicione um arquivo de áudio', type=['mp3', 'mp4', 'MP3', 'MP4', 'M4A', 'm4a', 'wav', 'WAV', 'flac', 'FLAC', 'ogg', 'OGG'])
     if not arquivo_audio is None:
-        try:
-            transcricao = client.audio.transcriptions.create(
+        def _transcreve():
+            arquivo_audio.seek(0)  # o arquivo é reenviado do início em caso de retentativa
+            return cliente().audio.transcriptions.create(
                 model='whisper-1',
                 language='pt',
                 response_format='text',
                 file=arquivo_audio,
                 prompt=prompt_input
             )
+        try:
+            with medir('whisper', origem='transcript'):
+                transcricao = limitador('openai', 'whisper').executa(_transcreve)
             st.write(transcricao)
         except Exception as e:
             st.error(f"Erro na transcrição: {str(e)}")
@@ -142,17 +159,31 @@ def sidebar():
     st.sidebar.divider()
     st.sidebar.caption("© 2025 autoMazze Assistant")
 # MAIN =====================================
+def _aba_aberta(aba):
+    # None quando a versão do Streamlit não informa qual aba está aberta
+    return getattr(aba, 'open', None) is not False
+
 def main():
+    define_sessao(st.session_state.get('sessao_id'))
     sidebar()
     st.image("./assets/image/autoMazze.png", width=400)
     st.markdown('#### Transcreva áudio do microfone, de vídeos e de arquivos de áudio')
-    tab_mic, tab_video, tab_audio = st.tabs(['Microfone', 'Vídeo', 'Áudio'])
+    try:
+        # Abas que reexecutam o script: só a aba aberta roda (e importa o que precisa)
+        tab_mic, tab_video, tab_audio = st.tabs(['Microfone', 'Vídeo', 'Áudio'], on_change='rerun', key='aba_transcript')
+    except TypeError:
+        # Streamlit sem abas com estado: todas as abas rodam, como antes
+        tab_mic, tab_video, tab_audio = st.tabs(['Microfone', 'Vídeo', 'Áudio'])
     with tab_mic:
-        transcreve_tab_mic()
+        if _aba_aberta(tab_mic):
+            transcreve_tab_mic()
     with tab_video:
-        transcreve_tab_video()
+        if _aba_aberta(tab_video):
+            transcreve_tab_video()
     with tab_audio:
-        transcreve_tab_audio()
+        if _aba_aberta(tab_audio):
+            transcreve_tab_audio()
+    COLETOR.persiste()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
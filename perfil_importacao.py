@@ -0,0 +1,176 @@
+# perfil_importacao.py
+# Perfil de importação das páginas (python -X importtime) para medir o cold start.
+#
+# Compara o que cada página importa hoje no topo do módulo com o cenário anterior,
+# em que as dependências pesadas (LangChain, OpenAI, moviepy, pydub, webrtc) eram
+# importadas antes de renderizar qualquer coisa.
+#
+# Uso:
+#   python perfil_importacao.py                 # tabela por página + módulos mais pesados
+#   python perfil_importacao.py --renderizacao  # mede a 1ª renderização (AppTest) e o que ela importa
+#   python perfil_importacao.py --json perfil.json
+
+import argparse
+import ast
+import json
+import re
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+RAIZ = Path(__file__).parent
+
+PAGINAS = {
+    "Home.py": RAIZ / "Home.py",
+    "pages/Transcript.py": RAIZ / "pages" / "Transcript.py",
+}
+
+# Dependências que cada página importava no topo antes do carregamento sob demanda
+IMPORTS_ANTERIORES = {
+    "Home.py": ["langchain.memory", "langchain_groq", "langchain_openai", "langchain.prompts"],
+    "pages/Transcript.py": ["streamlit_webrtc", "openai", "pydub", "moviepy"],
+}
+
+_LINHA = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+def imports_de_topo(caminho: Path) -> List[str]:
+    """Módulos importados no nível do módulo (fora de funções) de um arquivo."""
+    arvore = ast.parse(caminho.read_text(encoding="utf-8"))
+    modulos: List[str] = []
+    for no in arvore.body:
+        if isinstance(no, ast.Import):
+            modulos += [a.name for a in no.names]
+        elif isinstance(no, ast.ImportFrom) and no.module and not no.level:
+            modulos.append(no.module)
+    return list(dict.fromkeys(modulos))
+
+
+def _importtime(codigo: str) -> str:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        capture_output=True, text=True, cwd=str(RAIZ),
+    )
+    return proc.stderr
+
+
+def _modulos_da_inicializacao() -> set:
+    """Módulos que o interpretador já importa antes de qualquer código (site, encodings...)."""
+    return {m.group(4) for m in map(_LINHA.match, _importtime("pass").splitlines()) if m}
+
+
+def perfil(modulos: List[str]) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """
+    Importa `modulos` em um interpretador novo com -X importtime.
+    Devolve (total em ms, [(pacote de topo, cumulativo em ms)], módulos que falharam),
+    sem contar o que o próprio interpretador importa na inicialização.
+    """
+    ignorar = _modulos_da_inicializacao()
+    codigo = textwrap.dedent(f"""
+        import importlib, sys
+        for m in {modulos!r}:
+            try:
+                importlib.import_module(m)
+            except Exception:
+                print("FALHOU " + m, file=sys.stderr)
+    """)
+    total_us = 0
+    topo: Dict[str, int] = {}
+    falhas: List[str] = []
+    for linha in _importtime(codigo).splitlines():
+        if linha.startswith("FALHOU "):
+            falhas.append(linha.split(" ", 1)[1])
+            continue
+        m = _LINHA.match(linha)
+        if not m:
+            continue
+        proprio, cumulativo, recuo, nome = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        if nome in ignorar:
+            continue
+        total_us += proprio
+        if len(recuo) == 1:  # importado diretamente (não como dependência de outro)
+            raiz = nome.split(".")[0]
+            topo[raiz] = topo.get(raiz, 0) + cumulativo
+    pesados = sorted(((k, v / 1000) for k, v in topo.items()), key=lambda kv: -kv[1])
+    return total_us / 1000, pesados, falhas
+
+
+def primeira_renderizacao(caminho: Path, pesados: List[str]) -> Dict[str, object]:
+    """
+    Tempo da primeira execução da página (AppTest) em um processo novo e quais dos
+    módulos `pesados` ela de fato importou (imports dentro de funções contam aqui).
+    """
+    codigo = textwrap.dedent(f"""
+        import json, sys, time
+        inicio = time.perf_counter()
+        from streamlit.testing.v1 import AppTest
+        at = AppTest.from_file({str(caminho)!r}, default_timeout=300)
+        at.secrets["OPENAI_API_KEY"] = "perfil"
+        at.secrets["GROQ_API_KEY"] = "perfil"
+        at.run()
+        erro = at.exception[0].message if at.exception else None
+        carregados = [m for m in {pesados!r} if m in sys.modules]
+        print(json.dumps({{"ms": round((time.perf_counter() - inicio) * 1000, 1), "erro": erro,
+                          "pesados_carregados": carregados}}))
+    """)
+    proc = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, cwd=str(RAIZ))
+    try:
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return {"ms": None, "erro": (proc.stderr.strip().splitlines() or ["falhou"])[-1],
+                "pesados_carregados": None}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Perfil de importação das páginas do autoMazze")
+    parser.add_argument("--top", type=int, default=10, help="quantos pacotes pesados listar")
+    parser.add_argument("--renderizacao", action="store_true", help="mede também a 1ª renderização")
+    parser.add_argument("--json", help="grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    relatorio = []
+    for nome, caminho in PAGINAS.items():
+        agora = imports_de_topo(caminho)
+        ms_agora, pesados_agora, falhas_agora = perfil(agora)
+        ms_antes, pesados_antes, falhas_antes = perfil(agora + IMPORTS_ANTERIORES[nome])
+        item = {
+            "pagina": nome,
+            "imports_topo": agora,
+            "ms_agora": round(ms_agora, 1),
+            "ms_antes": round(ms_antes, 1),
+            "ganho_ms": round(ms_antes - ms_agora, 1),
+            "mais_pesados_antes": [(m, round(v, 1)) for m, v in pesados_antes[:args.top]],
+            "sob_demanda": sorted({m for m, _ in pesados_antes} - {m for m, _ in pesados_agora}),
+            "nao_instalados": sorted(set(falhas_agora) | set(falhas_antes)),
+        }
+        if args.renderizacao:
+            item["primeira_renderizacao"] = primeira_renderizacao(caminho, IMPORTS_ANTERIORES[nome])
+        relatorio.append(item)
+
+        print(f"\n== {nome}")
+        print(f"  imports no topo agora : {', '.join(agora)}")
+        print(f"  importação agora      : {item['ms_agora']:>9.1f} ms")
+        print(f"  importação antes      : {item['ms_antes']:>9.1f} ms")
+        print(f"  ganho no cold start   : {item['ganho_ms']:>9.1f} ms")
+        if args.renderizacao:
+            r = item["primeira_renderizacao"]
+            print(f"  1ª renderização       : {r['ms'] if r['ms'] is not None else '-':>9} ms"
+                  + (f"  (erro: {r['erro']})" if r.get("erro") else ""))
+            if r.get("pesados_carregados") is not None:
+                print(f"  pesados na 1ª renderização: {', '.join(r['pesados_carregados']) or 'nenhum'}")
+        if item["nao_instalados"]:
+            print(f"  não instalados (fora da medição): {', '.join(item['nao_instalados'])}")
+        print("  pacotes mais pesados no cenário anterior:")
+        for modulo, ms in item["mais_pesados_antes"]:
+            marca = "  (agora sob demanda)" if modulo in item["sob_demanda"] else ""
+            print(f"    {modulo:<28} {ms:>9.1f} ms{marca}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+# roteamento.py
+# Roteamento por tamanho de prompt: escolhe o modelo configurado mais barato cuja
+# janela de contexto comporta o prompt e troca de provedor em 429/timeout.
+#
+# Os provedores entram como fábricas (nome do modelo -> chat LangChain), então
+# dá para exercitar o roteador com modelos falsos locais, por exemplo:
+#     from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+#     Roteador(CATALOGO, {'OpenAI': lambda m: GenericFakeChatModel(messages=iter(['oi']))})
+
+import math
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from documentos import estima_tokens
+from limitador import e_retentavel, limitador
+
+
+# ---------------------------------------------------------------------
+# Catálogo de modelos
+# ---------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class PerfilModelo:
+    provedor: str
+    modelo: str
+    contexto: int         # janela de contexto em tokens
+    custo_entrada: float  # USD por 1M de tokens de entrada
+
+
+CATALOGO = [
+    PerfilModelo('OpenAI', 'gpt-5-nano', 400_000, 0.05),
+    PerfilModelo('OpenAI', 'gpt-4.1-nano', 1_047_576, 0.10),
+    PerfilModelo('OpenAI', 'gpt-5-mini', 400_000, 0.25),
+    PerfilModelo('OpenAI', 'gpt-5', 400_000, 1.25),
+    PerfilModelo('OpenAI', 'gpt-4o', 128_000, 2.50),
+    PerfilModelo('Groq', 'qwen-qwq-32b', 131_072, 0.29),
+    PerfilModelo('Groq', 'llama-3.3-70b-versatile', 131_072, 0.59),
+    PerfilModelo('Groq', 'deepseek-r1-distill-llama-70b', 131_072, 0.75),
+]
+
+
+# ---------------------------------------------------------------------
+# Utilidades
+# ---------------------------------------------------------------------
+
+def estima_tokens_prompt(textos: Iterable[str]) -> int:
+    """
+    Estimativa local (~4 caracteres por token), sem rede: roda a cada mensagem.
+    A folga de saída do roteador cobre a diferença para o tokenizador real.
+    """
+    return sum(estima_tokens(t or "") for t in textos)
+
+
+class ErroRoteamento(RuntimeError):
+    pass
+
+
+class EstatisticasModelo:
+    """Tempo até o primeiro token (média móvel) e contagem de falhas por modelo."""
+
+    def __init__(self, alfa: float = 0.3) -> None:
+        self.alfa = alfa
+        self.ttft: Optional[float] = None
+        self.chamadas = 0
+        self.falhas = 0
+        self.ultimo_erro: Optional[str] = None
+
+    def registra_ttft(self, segundos: float) -> None:
+        self.chamadas += 1
+        self.ttft = segundos if self.ttft is None else self.alfa * segundos + (1 - self.alfa) * self.ttft
+
+    def registra_falha(self, erro: BaseException) -> None:
+        self.falhas += 1
+        self.ultimo_erro = f"{type(erro).__name__}: {erro}"
+
+
+# ---------------------------------------------------------------------
+# Roteador
+# ---------------------------------------------------------------------
+
+class Roteador:
+    """
+    Seleciona e executa modelos em ordem de custo (e TTFT medido como desempate).
+    Erros retentáveis antes do primeiro token passam para o próximo candidato;
+    com `hedge_apos` definido, um segundo candidato de outro provedor é iniciado
+    se o primeiro não responder nesse tempo, e vence quem emitir o primeiro token.
+    """
+
+    def __init__(
+        self,
+        catalogo: List[PerfilModelo],
+        fabricas: Dict[str, Callable[[str], object]],
+        folga_saida: int = 4096,
+        hedge_apos: Optional[float] = None,
+        max_tentativas: int = 3,
+    ) -> None:
+        self.catalogo = list(catalogo)
+        self.fabricas = fabricas
+        self.folga_saida = folga_saida
+        self.hedge_apos = hedge_apos
+        self.max_tentativas = max_tentativas
+        self.estatisticas: Dict[PerfilModelo, EstatisticasModelo] = {
+            p: EstatisticasModelo() for p in self.catalogo
+        }
+
+    def candidatos(self, tokens_prompt: int) -> List[PerfilModelo]:
+        cabem = [
+            p for p in self.catalogo
+            if p.provedor in self.fabricas and p.contexto >= tokens_prompt + self.folga_saida
+        ]
+        return sorted(cabem, key=lambda p: (p.custo_entrada, self.estatisticas[p].ttft or 0.0))
+
+    def _ordem_de_tentativas(self, tokens_prompt: int) -> List[PerfilModelo]:
+        """Alterna provedores: se um está limitado (429), o próximo candidato é de outro."""
+        restantes = self.candidatos(tokens_prompt)
+        ordem: List[PerfilModelo] = []
+        while restantes and len(ordem) < self.max_tentativas:
+            ultimo = ordem[-1].provedor if ordem else None
+            proximo = next((p for p in restantes if p.provedor != ultimo), restantes[0])
+            restantes.remove(proximo)
+            ordem.append(proximo)
+        return ordem
+
+    def _executa(self, perfil, template, entradas, fila, cancelar) -> None:
+        try:
+            chain = template | self.fabricas[perfil.provedor](perfil.modelo)
+            # Sem retentativas aqui: em 429/timeout quem decide é o próprio roteador (failover)
+            with limitador(perfil.provedor, 'chat').chamada():
+                for pedaco in chain.stream(entradas):
+                    if cancelar.is_set():
+                        return
+                    fila.put(('pedaco', perfil, pedaco))
+            fila.put(('fim', perfil, None))
+        except BaseException as e:
+            fila.put(('erro', perfil, e))
+
+    def stream(self, template, entradas: dict, tokens_prompt: int, resultado: Optional[dict] = None) -> Iterator:
+        """Gera os pedaços da resposta; `resultado` recebe o perfil escolhido e o TTFT."""
+        ordem = self._ordem_de_tentativas(tokens_prompt)
+        if not ordem:
+            raise ErroRoteamento(
+                f"Nenhum modelo configurado comporta um prompt de ~{tokens_prompt} tokens."
+            )
+
+        fila: "queue.Queue" = queue.Queue()
+        ativos: Dict[PerfilModelo, threading.Event] = {}
+        inicio: Dict[PerfilModelo, float] = {}
+
+        def inicia_proximo() -> bool:
+            if not ordem:
+                return False
+            perfil = ordem.pop(0)
+            ativos[perfil] = threading.Event()
+            inicio[perfil] = time.perf_counter()
+            threading.Thread(
+                target=self._executa,
+                args=(perfil, template, entradas, fila, ativos[perfil]),
+                daemon=True,
+            ).start()
+            return True
+
+        inicia_proximo()
+        limite_hedge = time.perf_counter() + self.hedge_apos if self.hedge_apos is not None else math.inf
+        vencedor: Optional[PerfilModelo] = None
+        ultimo_erro: Optional[BaseException] = None
+
+        try:
+            while True:
+                espera = None
+                if vencedor is None and limite_hedge != math.inf:
+                    espera = max(0.0, limite_hedge - time.perf_counter())
+                try:
+                    evento, perfil, valor = fila.get(timeout=espera)
+                except queue.Empty:
+                    # Primeiro candidato demorou: dispara a cobertura (hedge) uma vez
+                    limite_hedge = math.inf
+                    inicia_proximo()
+                    continue
+
+                if perfil not in ativos:
+                    continue  # candidato já cancelado
+
+                if evento == 'erro':
+                    self.estatisticas[perfil].registra_falha(valor)
+                    del ativos[perfil]
+                    if vencedor is not None or not e_retentavel(valor):
+                        raise valor
+                    ultimo_erro = valor
+                    if not ativos:
+                        if not inicia_proximo():
+                            raise ultimo_erro
+                        # Novo primário após failover: o prazo do hedge conta a partir dele
+                        if self.hedge_apos is not None:
+                            limite_hedge = time.perf_counter() + self.hedge_apos
+                    continue
+
+                if vencedor is None:
+                    vencedor = perfil
+                    ttft = time.perf_counter() - inicio[perfil]
+                    self.estatisticas[perfil].registra_ttft(ttft)
+                    if resultado is not None:
+                        resultado.update(perfil=perfil, ttft=ttft)
+                    for outro, cancelar in list(ativos.items()):
+                        if outro != perfil:
+                            cancelar.set()
+                            del ativos[outro]
+                if perfil != vencedor:
+                    continue
+                if evento == 'fim':
+                    return
+                yield valor
+        finally:
+            for cancelar in ativos.values():
+                cancelar.set()
+
+    def resumo(self) -> List[dict]:
+        linhas = []
+        for perfil, est in self.estatisticas.items():
+            linhas.append({
+                "provedor": perfil.provedor,
+                "modelo": perfil.modelo,
+                "ttft_s": round(est.ttft, 3) if est.ttft is not None else None,
+                "chamadas": est.chamadas,
+                "falhas": est.falhas,
+                "ultimo_erro": est.ultimo_erro,
+            })
+        return linhas